@@ -0,0 +1,134 @@
+"""Compares the table-driven PropertyDecoder with the per-call normalisation it replaced.
+
+Run from the repository root with python -m benchmarks.decoder_benchmark
+"""
+
+import datetime
+import json
+import timeit
+from typing import Any
+
+from src.pyowletapi.codec import json_loads
+from src.pyowletapi.const import PROPERTIES, VITALS_2, VITALS_3
+from src.pyowletapi.decoder import decoder_for
+
+VITALS = {
+    "ox": 97,
+    "hr": 120,
+    "bat": 80,
+    "btt": 300,
+    "rsi": 30,
+    "oxta": 96,
+    "bso": 1,
+    "sc": 2,
+    "st": 35,
+    "ss": 1,
+    "mv": 3,
+    "aps": 0,
+    "chg": 0,
+    "alrt": 0,
+    "ota": 0,
+    "srf": 0,
+    "sb": 0,
+    "mvb": 0,
+    "onm": 0,
+    "mst": 0,
+    "bsb": 0,
+    "hw": "obl",
+}
+
+RAW: dict[int, dict[str, dict[str, Any]]] = {
+    3: {
+        **{
+            name: {"value": 0}
+            for table in PROPERTIES.values()
+            for name in table.values()
+        },
+        "REAL_TIME_VITALS": {
+            "value": json.dumps(VITALS),
+            "data_updated_at": "2024-01-02T03:04:05Z",
+        },
+    },
+    2: {
+        **{
+            name: {"value": 0}
+            for table in PROPERTIES.values()
+            for name in table.values()
+        },
+        **{
+            name: {"value": 1} for table in VITALS_2.values() for name in table.values()
+        },
+    },
+}
+
+
+def legacy_normalise(
+    raw_properties: dict[str, dict[str, Any]], version: int
+) -> dict[str, Any]:
+    """The normalisation Sock ran on every update before the decoder."""
+    properties: dict[str, Any] = {}
+    for data_type, properties_tmp in PROPERTIES.items():
+        for key, property in properties_tmp.items():
+            try:
+                properties[key] = data_type(raw_properties[property]["value"])
+            except KeyError:
+                pass
+
+    if version == 3:
+        vitals = json_loads(raw_properties["REAL_TIME_VITALS"]["value"])
+        for data_type, vitals_list in VITALS_3.items():
+            for vital_desc, vital_key in vitals_list.items():
+                match vital_desc:
+                    case "base_station_on":
+                        try:
+                            properties[vital_desc] = vitals["bso"]
+                        except KeyError:
+                            pass
+                    case _:
+                        try:
+                            properties[vital_desc] = data_type(vitals[vital_key])
+                        except KeyError:
+                            pass
+        try:
+            properties["last_updated"] = datetime.datetime.strptime(
+                raw_properties["REAL_TIME_VITALS"]["data_updated_at"],
+                "%Y-%m-%dT%H:%M:%SZ",
+            ).strftime("%Y/%m/%d %H:%M:%S")
+        except KeyError:
+            pass
+
+    if version == 2:
+        for data_type, vitals_list in VITALS_2.items():
+            for vital_desc, vital_key in vitals_list.items():
+                try:
+                    properties[vital_desc] = data_type(
+                        raw_properties[vital_key]["value"]
+                    )
+                except KeyError:
+                    pass
+
+    return properties
+
+
+def main(number: int = 20000) -> None:
+    for version, raw in RAW.items():
+        decoder = decoder_for(version)
+        assert decoder.decode(raw, json_loads) == legacy_normalise(raw, version)
+        legacy = min(
+            timeit.repeat(
+                lambda: legacy_normalise(raw, version), number=number, repeat=5
+            )
+        )
+        compiled = min(
+            timeit.repeat(
+                lambda: decoder.decode(raw, json_loads), number=number, repeat=5
+            )
+        )
+        print(
+            f"v{version}: legacy {legacy / number * 1e6:.2f}us, decoder {compiled / number * 1e6:.2f}us, "
+            f"{legacy / compiled:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -23,8 +23,12 @@ except ImportError:
     pass
 
 from mcp.server.fastmcp import FastMCP
+import aiohttp
 from src.pyowletapi.api import OwletAPI
 from src.pyowletapi.sock import Sock
+from src.pyowletapi.token_store import FileTokenStore
+from src.pyowletapi.retry import RetryPolicy
+from src.pyowletapi.cache import ResponseCache
 from src.pyowletapi.exceptions import (
     OwletAuthenticationError,
     OwletConnectionError,
@@ -40,6 +44,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
 # Initialize FastMCP server
 mcp = FastMCP("owlet-monitor")
 
@@ -65,8 +70,24 @@ async def get_authenticated_api() -> OwletAPI:
             )
         
         logger.info(f"Authenticating with Owlet API for region: {region}")
-        api_client = OwletAPI(region=region, user=user, password=password)
-        
+        # Optional token file so restarts reuse tokens instead of logging in again
+        token_file = os.getenv("OWLET_TOKEN_FILE")
+        api_client = OwletAPI(
+            region=region,
+            user=user,
+            password=password,
+            validate_requests=False,
+            token_store=FileTokenStore(token_file) if token_file else None,
+            retry=RetryPolicy(),
+            breaker={"failure_threshold": 5, "reset_timeout": 30},
+            timeout=aiohttp.ClientTimeout(total=30, connect=10, sock_read=15),
+            activation_ttl=30,
+            cache=ResponseCache(),
+        )
+        
+        # Open connections to every Owlet host up front so the first tool call runs at steady state latency
+        await api_client.warmup()
+
         try:
             tokens = await api_client.authenticate()
             if tokens:
@@ -75,14 +96,14 @@ async def get_authenticated_api() -> OwletAPI:
                 logger.info("Using existing valid authentication")
         except OwletAuthenticationError as e:
             logger.error(f"Authentication failed: {e}")
-            api_client = None
+            await cleanup()
             raise OwletAuthenticationError(
                 f"Failed to authenticate with Owlet API: {str(e)}. "
                 "Please check your credentials in the environment variables."
             )
         except Exception as e:
             logger.error(f"Unexpected authentication error: {e}")
-            api_client = None
+            await cleanup()
             raise OwletAuthenticationError(
                 f"Unexpected authentication error: {str(e)}"
             )
@@ -839,19 +860,34 @@ async def get_baby_wellness_summary(device_serial: str = "") -> str:
 
 async def cleanup():
     """Cleanup function to close the API connection."""
-    global api_client
+    global api_client, devices
+    # The socks hold the client, drop them with it so nothing uses the closed session
+    devices = []
     if api_client:
         await api_client.close()
+        api_client = None
+
+
+async def startup():
+    """Authenticate and warm up connections once, before the server starts taking requests."""
+    try:
+        await get_authenticated_api()
+    except OwletError as e:
+        logger.error(f"Startup authentication failed: {e}")
+
+
+async def main():
+    """Start the client once, serve over stdio until the client disconnects, then close it."""
+    await startup()
+    try:
+        await mcp.run_stdio_async()
+    finally:
+        await cleanup()
 
 
 if __name__ == "__main__":
     try:
         # Run the FastMCP server
-        mcp.run(transport='stdio')
+        asyncio.run(main())
     except KeyboardInterrupt:
-        logger.info("Server shutting down...")
-    finally:
-        # Cleanup
-        if api_client:
-            import asyncio
-            asyncio.run(cleanup())
\ No newline at end of file
+        logger.info("Server shutting down...")
\ No newline at end of file
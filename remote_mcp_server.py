@@ -29,8 +29,12 @@ except ImportError:
     pass
 
 from fastmcp import FastMCP
+import aiohttp
 from src.pyowletapi.api import OwletAPI
 from src.pyowletapi.sock import Sock
+from src.pyowletapi.token_store import FileTokenStore
+from src.pyowletapi.retry import RetryPolicy
+from src.pyowletapi.cache import ResponseCache
 from src.pyowletapi.exceptions import (
     OwletAuthenticationError,
     OwletConnectionError,
@@ -138,14 +142,30 @@ async def get_authenticated_api() -> OwletAPI:
             )
         
         logger.info(f"Authenticating with Owlet API for region: {region}")
-        api_client = OwletAPI(region=region, user=user, password=password)
+        # Optional token file so restarts reuse tokens instead of logging in again
+        token_file = os.getenv("OWLET_TOKEN_FILE")
+        api_client = OwletAPI(
+            region=region,
+            user=user,
+            password=password,
+            validate_requests=False,
+            token_store=FileTokenStore(token_file) if token_file else None,
+            retry=RetryPolicy(),
+            breaker={"failure_threshold": 5, "reset_timeout": 30},
+            timeout=aiohttp.ClientTimeout(total=30, connect=10, sock_read=15),
+            activation_ttl=30,
+            cache=ResponseCache(),
+        )
         
+        # Open connections to every Owlet host up front so the first tool call runs at steady state latency
+        await api_client.warmup()
+
         try:
             tokens = await api_client.authenticate()
             logger.info("Successfully authenticated with Owlet API")
         except Exception as e:
             logger.error(f"Authentication failed: {e}")
-            api_client = None
+            await cleanup()
             raise OwletAuthenticationError(f"Failed to authenticate: {str(e)}")
     
     return api_client
@@ -981,9 +1001,20 @@ async def _generate_device_content(device: Sock, properties: Dict[str, Any]) ->
 
 async def cleanup():
     """Cleanup function to close the API connection."""
-    global api_client
+    global api_client, devices
+    # The socks hold the client, drop them with it so nothing uses the closed session
+    devices = []
     if api_client:
         await api_client.close()
+        api_client = None
+
+
+async def startup():
+    """Authenticate and warm up connections once, before the server starts taking requests."""
+    try:
+        await get_authenticated_api()
+    except OwletError as e:
+        logger.error(f"Startup authentication failed: {e}")
 
 
 async def initialize_and_run():
@@ -1012,9 +1043,11 @@ async def initialize_and_run():
     logger.info(f"Starting server on {host}:{port}")
     logger.info("Server will be accessible via SSE transport")
     
+    # The client is started once here and shared by every client session, closed once the server stops
+    await startup()
     try:
-        # Use FastMCP's built-in run method with SSE transport for OpenAI compatibility
-        server.run(transport="sse", host=host, port=port)
+        # Run FastMCP's SSE transport in this event loop, the one the client's connections belong to
+        await server.run_async(transport="sse", host=host, port=port)
     except Exception as e:
         logger.error(f"Server error: {e}")
         raise
@@ -1053,10 +1086,26 @@ def run_with_fallback():
     
     app = FastAPI(title="Owlet Baby Monitor MCP Server")
     
+    @app.on_event("startup")
+    async def on_startup():
+        """Authenticate and warm up connections before the server starts reporting healthy."""
+        await startup()
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        """Close the client once the server stops."""
+        await cleanup()
+    
     @app.get("/health")
     async def health_check():
         """Health check endpoint."""
-        return {"status": "healthy", "service": "owlet-mcp-server", "transport": "fallback"}
+        breakers = api_client.breaker_states if api_client else {}
+        return {
+            "status": "degraded" if "open" in breakers.values() else "healthy",
+            "service": "owlet-mcp-server",
+            "transport": "fallback",
+            "circuit_breakers": breakers,
+        }
     
     @app.get("/")
     async def root():
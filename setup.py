@@ -25,4 +25,5 @@ setup(
     package_data={"pyowletapi": ["py.typed"]},
     python_requires=">=3.10",
     install_requires=["aiohttp"],
+    extras_require={"fast": ["orjson"]},
 )
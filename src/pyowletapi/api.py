@@ -3,7 +3,24 @@ import time
 import logging
 from logging import Logger
 import asyncio
-from typing import TypedDict, Optional, Any, NotRequired
+import contextlib
+import datetime
+import inspect
+import random
+from urllib.parse import urlsplit, urlencode
+from typing import (
+    TypedDict,
+    Optional,
+    Any,
+    NotRequired,
+    Callable,
+    Coroutine,
+    AsyncGenerator,
+    AsyncIterator,
+    Iterable,
+    Hashable,
+    Union,
+)
 
 from .exceptions import (
     OwletCredentialsError,
@@ -11,12 +28,30 @@ from .exceptions import (
     OwletConnectionError,
     OwletDevicesError,
     OwletError,
+    OwletCircuitOpenError,
+    OwletTimeoutError,
 )
-from .const import REGION_INFO
+from .const import REGION_INFO, VERSION_PROPERTIES
+from .token_store import TokenStore
+from .retry import RetryPolicy
+from .ratelimit import RateLimiter
+from .breaker import BreakerConfig, BreakerState, CircuitBreaker
+from .cache import ResponseCache
+from .codec import JsonLoads, json_loads as default_json_loads
+
+ENDPOINT_CLASSES: tuple[str, ...] = ("auth", "devices", "properties", "datapoints")
 
 logger: Logger = logging.getLogger(__package__)
 
 
+class _Flight:
+    """A call in flight shared by concurrent callers, and the number of them still waiting on it."""
+
+    def __init__(self, task: "asyncio.Task[Any]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
 class SockData(TypedDict):
     product_name: str
     model: str
@@ -34,6 +69,22 @@ class TokenDict(TypedDict):
     api_token: Optional[str]
     expiry: Optional[float]
     refresh: Optional[str]
+    ayla_refresh: NotRequired[Optional[str]]
+
+
+class PoolConfig(TypedDict, total=False):
+    limit: int
+    limit_per_host: int
+    keepalive_timeout: float
+    ttl_dns_cache: Optional[int]
+
+
+class PoolStats(TypedDict):
+    limit: int
+    limit_per_host: int
+    in_use: int
+    idle: int
+    waiters: int
 
 
 class DevicesResponse(TypedDict):
@@ -46,6 +97,18 @@ class PropertiesResponse(TypedDict):
     tokens: NotRequired[TokenDict]
 
 
+class PropertyResponse(TypedDict):
+    response: dict[str, Any]
+    tokens: NotRequired[TokenDict]
+
+
+class Datapoint(TypedDict):
+    value: Any
+    created_at: str
+    updated_at: str
+    metadata: dict[str, Any]
+
+
 class OwletAPI:
     """A class that creates an API object, to be used to call against the Owlet baby Monitor API.
 
@@ -65,6 +128,8 @@ class OwletAPI:
         The aiohttp session is stored to be called against
     headers : dict
         The api headers are stored as a dict, once authenticated this contains the authkey in the correct format for future api calls
+    cache : ResponseCache
+        The response cache if one was passed in, its stats property reports hits, misses and evictions
     devices : dict
         Once retrieved the list of user devices (Owlet socks) are stored
     region_info : dict
@@ -84,6 +149,8 @@ class OwletAPI:
         Turns on the base station, API requires that APP_ACTIVE be set to 1 to respond
     get_properties(device: str):
         For a provided device serial number this returns a dict of the current properties for this device from the API
+    iter_datapoints(device: str, name: str):
+        Iterates over the history of a property of the device one page at a time
     request(method: str, url: str, data: dict = None):
         method used for all the subsequent api calls after the original authenticate call, rather than repeating the same code multiple times
         takes a method string which should either be 'GET' or 'POST', a url string for the relevant API endpoint and a dictionary containing
@@ -100,6 +167,18 @@ class OwletAPI:
         expiry: Optional[float] = None,
         refresh: Optional[str] = None,
         session: Optional[aiohttp.ClientSession] = None,
+        validate_requests: bool = True,
+        ayla_refresh: Optional[str] = None,
+        token_store: Optional[TokenStore] = None,
+        pool: Optional[PoolConfig] = None,
+        retry: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        breaker: Optional[BreakerConfig] = None,
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+        activation_ttl: float = 0,
+        cache: Optional[ResponseCache] = None,
+        json_loads: Optional[JsonLoads] = None,
+        account: Optional[str] = None,
     ) -> None:
         """Sets all the necessary variables for the API caller based on the passed in information, if a session is not passed in then one is created.
 
@@ -112,16 +191,69 @@ class OwletAPI:
         expiry (str):The expiry date of the connection is stored such that if the connection is expired the object reauthenticates
         refresh (str):The refresh token for the api, this can be passed if in known, if not passed then the api will authenticate and store the new refresh token for future use
         session (aiohttp.ClientSession), optional:The aiohttp session is stored to be called against
+        validate_requests (bool), optional:If True every request is preceded by a call to validate the auth token, if False the stored expiry
+        decides when to reauthenticate and a 401 response triggers a single reauthentication and retry
+        ayla_refresh (str), optional:The Ayla refresh token returned by token sign in, if known the auth token can be renewed with a single request
+        token_store (TokenStore), optional:Tokens are loaded from the store before the first request and saved back to it whenever they
+        change, including by a direct call to password_verification, token_sign_in or ayla_token_refresh
+        pool (PoolConfig), optional:Connection pool settings (limit, limit_per_host, keepalive_timeout, ttl_dns_cache) for the session created
+        when no session is passed in
+        retry (RetryPolicy), optional:Policy for retrying API requests that fail with a network error or a transient status, without
+        one a failed request raises straight away
+        rate_limiter (RateLimiter), optional:Limiter every upstream request waits on before it is sent, may be shared between api objects
+        breaker (BreakerConfig), optional:Settings for a circuit breaker per endpoint class (auth, devices, properties, datapoints), while a
+        breaker is open requests to that class raise OwletCircuitOpenError without being sent
+        timeout (aiohttp.ClientTimeout), optional:Total, connect and read timeouts applied to every request, the total is shortened to fit
+        a call's deadline, a request that times out raises OwletTimeoutError
+        activation_ttl (float), optional:Seconds after activating a device during which get_properties and post_command skip posting
+        APP_ACTIVE again, 0 activates before every call
+        cache (ResponseCache), optional:Cache GET responses are served from while fresh, a POST to a device drops that device's entries
+        apart from the APP_ACTIVE post
+        json_loads (Callable), optional:Function decoding every response body and the json embedded in properties, orjson.loads when
+        orjson is installed otherwise json.loads
+        account (str), optional:Key of the account's bucket in the rate limiter, defaults to user. Give api objects created from tokens
+        alone an account each, without one they share the bucket of their region
 
         """
         self._region = region
         self._user = user
+        self._account = account or user
         self._password = password
         self._auth_token: Optional[str] = token
         self._expiry: Optional[float] = expiry
         self._refresh: Optional[str] = refresh
+        self._ayla_refresh: Optional[str] = ayla_refresh
         self._tokens_changed: bool = False
-        self.session: aiohttp.ClientSession = session or aiohttp.ClientSession()
+        self._token_store = token_store
+        self._tokens_loaded = token_store is None
+        self._store_pending = False
+        self._load_lock = asyncio.Lock()
+        self._rejected_token: Optional[str] = None
+        self._validate_requests = validate_requests
+        self._retry = retry
+        self._rate_limiter = rate_limiter
+        self._timeout = timeout
+        self._activation_ttl = activation_ttl
+        self._activated_at: dict[str, float] = {}
+        self._versions: dict[str, int] = {}
+        self._json_loads = json_loads or default_json_loads
+        self.cache = cache
+        self._breakers: dict[str, CircuitBreaker] = (
+            {name: CircuitBreaker(**breaker) for name in ENDPOINT_CLASSES}
+            if breaker is not None
+            else {}
+        )
+        self._auth_task: Optional[asyncio.Task[Optional[TokenDict]]] = None
+        self._renewal_task: Optional[asyncio.Task[None]] = None
+        self._metrics: dict[str, float] = {}
+        self._in_flight: dict[Hashable, _Flight] = {}
+        if session is None:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**pool) if pool else None,
+            )
+        elif pool:
+            logger.warning("Pool settings are ignored when a session is passed in")
+        self.session: aiohttp.ClientSession = session
         self.headers: dict[str, str] = {}
 
         if self._auth_token:
@@ -139,16 +271,72 @@ class OwletAPI:
             "api_token": self._auth_token,
             "expiry": self._expiry,
             "refresh": self._refresh,
+            "ayla_refresh": self._ayla_refresh,
         }
 
-    async def password_verification(self) -> None:
+    @property
+    def pool_stats(self) -> PoolStats:
+        """Returns the limits of the session's connection pool with the number of connections in use, idle connections and requests
+        waiting for a connection"""
+        connector = self.session.connector
+        # aiohttp has no public api for pool usage, read the connector internals defensively
+        conns = getattr(connector, "_conns", {})
+        waiters = getattr(connector, "_waiters", {})
+        return {
+            "limit": connector.limit if connector else 0,
+            "limit_per_host": connector.limit_per_host if connector else 0,
+            "in_use": len(getattr(connector, "_acquired", ())),
+            "idle": sum(len(host_conns) for host_conns in conns.values()),
+            "waiters": sum(len(host_waiters) for host_waiters in waiters.values()),
+        }
+
+    @property
+    def breaker_states(self) -> dict[str, BreakerState]:
+        """Returns the state of the circuit breaker for each endpoint class, empty if circuit breakers are not enabled"""
+        return {name: breaker.state for name, breaker in self._breakers.items()}
+
+    @property
+    def metrics(self) -> dict[str, float]:
+        """Returns a copy of the counters recorded by this api object, e.g. refresh_coalesced for callers that joined an in-flight authentication"""
+        return dict(self._metrics)
+
+    def json_loads(self, data: Union[str, bytes]) -> Any:
+        """Decodes json with the api object's codec, the time taken is added to the json_decode_seconds metric."""
+        start = time.perf_counter()
+        try:
+            return self._json_loads(data)
+        finally:
+            self._record("json_decode_seconds", time.perf_counter() - start)
+
+    async def _read_json(self, response: aiohttp.ClientResponse) -> Any:
+        """Reads and decodes a response body, None if it is empty."""
+        body = await response.read()
+        if not body.strip():
+            return None
+        try:
+            return self.json_loads(body)
+        except ValueError as err:
+            raise OwletConnectionError(
+                f"Invalid json in response, status {response.status}"
+            ) from err
+
+    def _record(self, name: str, value: float = 1) -> None:
+        self._metrics[name] = self._metrics.get(name, 0) + value
+
+    async def password_verification(self, deadline: Optional[float] = None) -> None:
         """Will attempt to use the users username and password to login to the identitytoolkit api if authentication fails
         for any reason the relevant error is thrown, otherwise the returned refresh token will be stored.
+
+        Parameters
+        ----------
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
+
         """
         api_key = REGION_INFO[self._region]["apiKey"]
-        async with self.session.request(
+        async with self._open(
             "POST",
-            f"https://www.googleapis.com/identitytoolkit/v3/relyingparty/verifyPassword?key={api_key}",
+            f"{REGION_INFO[self._region]['url_password']}?key={api_key}",
+            deadline=deadline,
             data={
                 "email": self._user,
                 "password": self._password,
@@ -159,7 +347,7 @@ class OwletAPI:
                 "X-Android-Cert": "2A3BC26DB0B8B0792DBE28E6FFDC2598F9B12B74",
             },
         ) as response:
-            response_json = await response.json()
+            response_json = await self._read_json(response)
             if response.status != 200:
                 match response.status:
                     case 400:
@@ -205,20 +393,30 @@ class OwletAPI:
                 new_token=self._auth_token,
                 new_expiry=self._expiry,
                 new_refresh=response_json["refreshToken"],
+                new_ayla_refresh=self._ayla_refresh,
             )
+            await self._save_tokens()
 
-    async def get_mini_token(self, id_token: str) -> str:
+    async def get_mini_token(
+        self, id_token: str, deadline: Optional[float] = None
+    ) -> str:
         """Attempts to authenticate against the ayla mini token service with the given ID token
         any response other than a 200 response will throw an error.
 
+        Parameters
+        ----------
+        id_token (str):The Google ID token returned by the securetoken refresh
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
+
         Returns
         -------
         (str): String with the returned mini token, for use with final sign in step
 
         """
-        async with self.session.request(
+        async with self._open(
             "GET",
             REGION_INFO[self._region]["url_mini"],
+            deadline=deadline,
             headers={
                 "Authorization": id_token,
             },
@@ -232,21 +430,31 @@ class OwletAPI:
                             "Generic ayla mini error, contact dev",
                         )
 
-            response_json: dict[str, str] = await response.json()
+            response_json: dict[str, str] = await self._read_json(response)
             return response_json["mini_token"]
 
-    async def token_sign_in(self, mini_token: str) -> Optional[TokenDict]:
+    async def token_sign_in(
+        self,
+        mini_token: str,
+        deadline: Optional[float] = None,
+    ) -> Optional[TokenDict]:
         """Will use the provided mini token to attempt to authenticate against the owlet endpoint, anything other than a 200 response
         will throw an error. If successful the token dict containing the auth_token, expiry and refresh token will be returned.
 
+        Parameters
+        ----------
+        mini_token (str):The mini token returned by get_mini_token
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
+
         Returns
         -------
         (TokenDict): Dictionary containing the api token, token expiry time and refresh token
 
         """
-        async with self.session.request(
+        async with self._open(
             "POST",
             REGION_INFO[self._region]["url_signin"],
+            deadline=deadline,
             json={
                 "app_id": REGION_INFO[self._region]["app_id"],
                 "app_secret": REGION_INFO[self._region]["app_secret"],
@@ -254,7 +462,7 @@ class OwletAPI:
                 "token": mini_token,
             },
         ) as response:
-            response_json = await response.json()
+            response_json = await self._read_json(response)
 
             if response.status != 200:
                 match response.status:
@@ -273,7 +481,59 @@ class OwletAPI:
                 new_token=response_json["access_token"],
                 new_expiry=time.time() - 60 + response_json["expires_in"],
                 new_refresh=self._refresh,
+                new_ayla_refresh=response_json.get("refresh_token", self._ayla_refresh),
+            )
+            await self._save_tokens()
+
+            if self._tokens_changed:
+                self._tokens_changed = False
+                return self.tokens
+            else:
+                return None
+
+    async def ayla_token_refresh(
+        self, deadline: Optional[float] = None
+    ) -> Optional[TokenDict]:
+        """Will use the stored Ayla refresh token to renew the auth token with a single request to the Ayla refresh endpoint,
+        anything other than a 200 response will throw an error, OwletAuthenticationError if the refresh token was rejected. If
+        successful and the tokens have changed the token dict is returned.
+
+        Parameters
+        ----------
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
+
+        Returns
+        -------
+        (TokenDict): Dictionary containing the api token, token expiry time and refresh tokens
+
+        """
+        if not self._ayla_refresh:
+            raise OwletAuthenticationError("No Ayla refresh token supplied")
+
+        async with self._open(
+            "POST",
+            REGION_INFO[self._region]["url_refresh"],
+            deadline=deadline,
+            json={"user": {"refresh_token": self._ayla_refresh}},
+        ) as response:
+            if response.status != 200:
+                match response.status:
+                    case 400 | 401:
+                        raise OwletAuthenticationError("Ayla refresh token not valid")
+                    case _:
+                        raise OwletError(
+                            "Generic ayla refresh error, contact dev",
+                        )
+
+            response_json = await self._read_json(response)
+
+            self._update_tokens(
+                new_token=response_json["access_token"],
+                new_expiry=time.time() - 60 + response_json["expires_in"],
+                new_refresh=self._refresh,
+                new_ayla_refresh=response_json.get("refresh_token", self._ayla_refresh),
             )
+            await self._save_tokens()
 
             if self._tokens_changed:
                 self._tokens_changed = False
@@ -283,20 +543,49 @@ class OwletAPI:
 
     async def refresh_authentication(
         self,
+        deadline: Optional[float] = None,
     ) -> Optional[TokenDict]:
         """Will attempt to refresh authentication when expired, if no refresh token exists or authentication fails then the relevant
-        error will be thrown. On successful authentication a TokenDict will be returned.
+        error will be thrown. On successful authentication a TokenDict will be returned. If a refresh or authentication is already
+        in flight the caller waits for that one rather than starting another.
+
+        Parameters
+        ----------
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
 
         Returns
         -------
         (TokenDict): Dictionary containing the new api token, token expiry time and new refresh token
 
         """
+        return await self._single_flight(self._refresh_authentication, deadline)
+
+    async def _refresh_authentication(
+        self,
+        deadline: Optional[float] = None,
+    ) -> Optional[TokenDict]:
+        ayla_error: Optional[Exception] = None
+        if self._ayla_refresh:
+            try:
+                return await self.ayla_token_refresh(deadline)
+            except OwletAuthenticationError as err:
+                # A rejected Ayla refresh token will not recover, drop it so only the full chain is tried from now on
+                logger.debug("Ayla token refresh failed, using full refresh: %s", err)
+                self._ayla_refresh = None
+                ayla_error = err
+            except (OwletError, aiohttp.ClientError) as err:
+                # The Ayla endpoint may just be down or slow, keep the token for next time but still try the full chain now
+                logger.debug("Ayla token refresh failed, using full refresh: %s", err)
+                ayla_error = err
+
+        if not self._refresh and ayla_error is not None:
+            raise ayla_error
         if self._refresh:
             api_key = REGION_INFO[self._region]["apiKey"]
-            async with self.session.request(
+            async with self._open(
                 "POST",
-                f"https://securetoken.googleapis.com/v1/token?key={api_key}",
+                f"{REGION_INFO[self._region]['url_securetoken']}?key={api_key}",
+                deadline=deadline,
                 data={
                     "grantType": "refresh_token",
                     "refreshToken": self._refresh,
@@ -306,7 +595,7 @@ class OwletAPI:
                     "X-Android-Cert": "2A3BC26DB0B8B0792DBE28E6FFDC2598F9B12B74",
                 },
             ) as response:
-                response_json = await response.json()
+                response_json = await self._read_json(response)
 
                 if response.status != 200:
                     match response.status:
@@ -323,56 +612,323 @@ class OwletAPI:
                     new_token=self._auth_token,
                     new_expiry=self._expiry,
                     new_refresh=response_json["refresh_token"],
+                    new_ayla_refresh=self._ayla_refresh,
                 )
 
                 mini_token: str = await self.get_mini_token(
                     response_json["id_token"],
+                    deadline=deadline,
                 )
 
-                return await self.token_sign_in(mini_token)
+                return await self.token_sign_in(mini_token, deadline=deadline)
         raise OwletAuthenticationError("No refresh token supplied")
 
-    async def authenticate(self) -> Optional[TokenDict]:
+    async def authenticate(
+        self, deadline: Optional[float] = None
+    ) -> Optional[TokenDict]:
         """Authentiactes the user against the Owlet api using the provided details.
 
         Sets the values of the headers and expiry time variables on the object.
 
+        Parameters
+        ----------
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
+
         Returns
         -------
         None: if auth_token and expiry in object are ok then returns none
         dict: If auth token generated then dict with the new token returned
 
         """
-        if self._auth_token is None and self._refresh is None:
-            if self._user is None or self._password is None:
-                raise OwletAuthenticationError(
-                    "Username or password not supplied",
-                )
+        await self._load_tokens()
+        if not self._auth_required():
+            return None
 
-            await self.password_verification()
+        return await self._single_flight(self._authenticate, deadline)
 
-        if (
+    def _auth_required(self) -> bool:
+        return (
             self._auth_token is None
             or self._expiry is None
             or self._expiry <= time.time()
+        )
+
+    async def _authenticate(
+        self, deadline: Optional[float] = None
+    ) -> Optional[TokenDict]:
+        if (
+            self._auth_token is None
+            and self._refresh is None
+            and self._ayla_refresh is None
         ):
-            return await self.refresh_authentication()
+            if self._user is None or self._password is None:
+                raise OwletAuthenticationError(
+                    "Username or password not supplied",
+                )
+
+            await self.password_verification(deadline)
+
+        if self._auth_required():
+            return await self._refresh_authentication(deadline)
 
         return None
 
-    async def validate_authentication(self) -> Optional[TokenDict]:
-        async with self.session.request(
+    async def _single_flight(
+        self,
+        auth_call: Callable[
+            [Optional[float]], Coroutine[Any, Any, Optional[TokenDict]]
+        ],
+        deadline: Optional[float],
+    ) -> Optional[TokenDict]:
+        """Runs auth_call as the one in-flight authentication, concurrent callers wait on and share its result.
+
+        The task is shielded so a cancelled or timed out caller does not abort the authentication for everyone else. The task
+        runs under the configured request timeout rather than the deadline of whichever caller started it, so a caller with a
+        short deadline cannot fail it for callers with longer ones, each caller still waits no longer than its own deadline.
+        """
+        remaining = self._remaining(deadline)
+        if self._auth_task is None or self._auth_task.done():
+            self._auth_task = asyncio.create_task(self._run_auth(auth_call, None))
+            self._auth_task.add_done_callback(
+                lambda task: task.cancelled() or task.exception()
+            )
+        else:
+            self._record("refresh_coalesced")
+        if remaining is None:
+            return await asyncio.shield(self._auth_task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._auth_task), remaining)
+        except asyncio.TimeoutError as err:
+            raise OwletTimeoutError(
+                "Authentication did not finish before the deadline"
+            ) from err
+
+    async def _run_auth(
+        self,
+        auth_call: Callable[
+            [Optional[float]], Coroutine[Any, Any, Optional[TokenDict]]
+        ],
+        deadline: Optional[float],
+    ) -> Optional[TokenDict]:
+        if self._token_store is None:
+            return await auth_call(deadline)
+
+        async with self._token_store.locked():
+            # Another api object sharing the store may have refreshed while this one waited for the lock
+            if await self._adopt_stored_tokens(self._token_store):
+                self._tokens_changed = False
+                return self.tokens
+            try:
+                return await auth_call(deadline)
+            finally:
+                await self._save_tokens()
+
+    async def _adopt_stored_tokens(self, token_store: TokenStore) -> bool:
+        """Switches to the stored tokens if they hold a different, unexpired auth token that the server has not rejected."""
+        stored = await token_store.load()
+        if (
+            not stored
+            or not stored.get("api_token")
+            or stored["api_token"] in (self._auth_token, self._rejected_token)
+            or (stored.get("expiry") or 0) <= time.time()
+        ):
+            return False
+
+        self._update_tokens(
+            new_token=stored["api_token"],
+            new_expiry=stored.get("expiry"),
+            new_refresh=stored.get("refresh"),
+            new_ayla_refresh=stored.get("ayla_refresh"),
+        )
+        self._store_pending = False
+        self._record("tokens_adopted")
+        return True
+
+    async def _load_tokens(self) -> None:
+        """Loads tokens from the token store once, stored tokens are used if this object has none or they expire later."""
+        if self._tokens_loaded or self._token_store is None:
+            return
+        async with self._load_lock:
+            if self._tokens_loaded:
+                return
+            stored = await self._token_store.load()
+            self._tokens_loaded = True
+
+        if not stored:
+            return
+        stored_expiry = stored.get("expiry")
+        if (self._auth_token is None and self._refresh is None) or (
+            stored_expiry is not None
+            and (self._expiry is None or stored_expiry > self._expiry)
+        ):
+            self._update_tokens(
+                new_token=stored.get("api_token"),
+                new_expiry=stored_expiry,
+                new_refresh=stored.get("refresh"),
+                new_ayla_refresh=stored.get("ayla_refresh"),
+            )
+            self._store_pending = False
+
+    async def _save_tokens(self) -> None:
+        if self._token_store is None or not self._store_pending:
+            return
+        self._store_pending = False
+        try:
+            await self._token_store.save(self.tokens)
+        except Exception:
+            self._store_pending = True
+            logger.exception("Could not save tokens to token store")
+
+    async def validate_authentication(
+        self,
+        deadline: Optional[float] = None,
+    ) -> Optional[TokenDict]:
+        sent_token = self._auth_token
+        async with self._open(
             "GET",
             self._api_url + "/devices.json",
+            deadline=deadline,
             headers=self.headers,
         ) as response:
             if response.status not in (200, 201):
-                self._auth_token = None
-                return await self.authenticate()
+                return await self._reauthenticate(sent_token, deadline)
             return None
 
+    async def _reauthenticate(
+        self,
+        rejected_token: Optional[str],
+        deadline: Optional[float] = None,
+    ) -> Optional[TokenDict]:
+        """Discards the rejected auth token and authenticates again, used once the server has rejected the token.
+
+        If the token has already been replaced, e.g. by a concurrent caller, the new token is kept.
+        """
+        self._rejected_token = rejected_token
+        if self._auth_token == rejected_token:
+            self._auth_token = None
+            self._expiry = None
+        return await self.authenticate(deadline)
+
+    async def warmup(self, timeout: float = 10) -> int:
+        """Resolves and opens pooled connections to every host in the region info concurrently, so the first real requests skip
+        the DNS lookup and TLS handshake.
+
+        Parameters
+        ----------
+        timeout (float):Seconds to wait for each host
+
+        Returns
+        -------
+        (int):Number of hosts a connection was opened to
+
+        """
+        origins = {
+            f"{url.scheme}://{url.netloc}"
+            for key, value in REGION_INFO[self._region].items()
+            if key.startswith("url_")
+            for url in [urlsplit(value)]
+        }
+        results = await asyncio.gather(
+            *(self._warm_origin(origin, timeout) for origin in sorted(origins))
+        )
+        return sum(results)
+
+    async def _warm_origin(self, origin: str, timeout: float) -> bool:
+        try:
+            async with self.session.head(
+                origin + "/",
+                allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ):
+                # Any response means the connection is up, it goes back to the pool when released
+                return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            logger.debug("Could not warm up connection to %s: %s", origin, err)
+            return False
+
+    def start_token_renewal(
+        self,
+        fraction: float = 0.8,
+        jitter: float = 0.1,
+        callback: Optional[Callable[[TokenDict], Any]] = None,
+        retry_interval: float = 60,
+    ) -> None:
+        """Starts a background task that renews the auth token before it expires, so requests never wait on authentication.
+
+        Parameters
+        ----------
+        fraction (float):Fraction of the remaining token lifetime to wait before renewing
+        jitter (float):Up to this fraction of the wait is randomly taken off, spreading renewals of many api objects
+        callback (Callable), optional:Called with the new TokenDict after each renewal, may be a coroutine function
+        retry_interval (float):Seconds to wait before trying again after a failed renewal
+
+        """
+        if not 0 < fraction < 1 or not 0 <= jitter < 1:
+            raise ValueError(
+                "fraction must be between 0 and 1 and jitter between 0 and 1"
+            )
+        if self._renewal_task and not self._renewal_task.done():
+            raise OwletError("Token renewal already running")
+
+        self._renewal_task = asyncio.create_task(
+            self._renew_tokens(fraction, jitter, callback, retry_interval)
+        )
+
+    async def stop_token_renewal(self) -> None:
+        """Stops the background token renewal task if it is running."""
+        if self._renewal_task:
+            self._renewal_task.cancel()
+            try:
+                await self._renewal_task
+            except asyncio.CancelledError:
+                pass
+            self._renewal_task = None
+
+    async def _renew_tokens(
+        self,
+        fraction: float,
+        jitter: float,
+        callback: Optional[Callable[[TokenDict], Any]],
+        retry_interval: float,
+    ) -> None:
+        while True:
+            expiry = self._expiry
+            if expiry is not None:
+                remaining = expiry - time.time()
+                await asyncio.sleep(
+                    max(0.0, remaining * fraction * random.uniform(1 - jitter, 1))
+                )
+                if self._expiry != expiry:
+                    # Renewed elsewhere while sleeping, schedule against the new expiry
+                    continue
+
+            try:
+                if self._auth_required():
+                    await self.authenticate()
+                else:
+                    await self.refresh_authentication()
+            except (OwletError, aiohttp.ClientError) as err:
+                logger.warning("Background token renewal failed: %s", err)
+                await asyncio.sleep(retry_interval)
+                continue
+            except Exception:
+                # Anything unexpected, e.g. a malformed token response, must not end renewal for good
+                logger.exception("Background token renewal failed")
+                await asyncio.sleep(retry_interval)
+                continue
+
+            self._record("token_renewals")
+            if callback:
+                try:
+                    result = callback(self.tokens)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    logger.exception("Token renewal callback failed")
+
     async def close(self) -> None:
         """Closes the aiohttp ClientSession."""
+        await self.stop_token_renewal()
         if self.session:
             await self.session.close()
 
@@ -381,37 +937,62 @@ class OwletAPI:
         new_token: Optional[str],
         new_expiry: Optional[float],
         new_refresh: Optional[str],
+        new_ayla_refresh: Optional[str],
     ) -> None:
         if (
             self._auth_token != new_token
             or self._expiry != new_expiry
             or self._refresh != new_refresh
+            or self._ayla_refresh != new_ayla_refresh
         ):
             self._auth_token = new_token
             if self._auth_token:
                 self.headers["Authorization"] = "auth_token " + self._auth_token
             self._expiry = new_expiry
             self._refresh = new_refresh
+            self._ayla_refresh = new_ayla_refresh
             self._tokens_changed = True
+            self._store_pending = True
 
-    async def _is_valid_version(self, dsn: str, versions: list[int]) -> bool:
-        properties = await self.get_properties(dsn)
-        properties_item = properties["response"]
-        if "REAL_TIME_VITALS" in properties_item:
-            return 3 in versions
-        if "CHARGE_STATUS" in properties_item:
-            return 2 in versions
-        return False
+    def device_version(self, dsn: str) -> Optional[int]:
+        """Returns the sock version get_devices found for the device, None if it has not been classified."""
+        return self._versions.get(dsn)
+
+    async def _classify_device(self, dsn: str, deadline: Optional[float] = None) -> int:
+        """Returns the sock version of the device, 0 if unknown. Only the properties that tell the versions apart are fetched, without
+        activating the device since their presence does not depend on it, and a known version is kept so it is only probed once.
+        """
+        if dsn not in self._versions:
+            probe = await self.get_properties(
+                dsn,
+                deadline=deadline,
+                activate=False,
+                names=VERSION_PROPERTIES,
+            )
+            version = next(
+                (
+                    version
+                    for name, version in VERSION_PROPERTIES.items()
+                    if name in probe["response"]
+                ),
+                0,
+            )
+            if not version:
+                return 0
+            self._versions[dsn] = version
+        return self._versions[dsn]
 
     async def get_devices(
         self,
         versions: list[int] = [3, 2],
+        deadline: Optional[float] = None,
     ) -> DevicesResponse:
         """Returns a list of devices from the Owlet API.
 
         Parameters
         ----------
         versions: takes a list of integers representing sock versions, will only return socks where the version is in the supplied list
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
 
         Returns
         -------
@@ -421,17 +1002,20 @@ class OwletAPI:
         api_response = await self._request(
             "GET",
             "/devices.json",
+            deadline=deadline,
         )
 
         if isinstance(api_response, list):
             devices = api_response
 
             checks = [
-                self._is_valid_version(d["device"]["dsn"], versions) for d in devices
+                self._classify_device(d["device"]["dsn"], deadline) for d in devices
             ]
             results = await asyncio.gather(*checks)
 
-            valid_devices = [d for d, valid in zip(devices, results) if valid]
+            valid_devices = [
+                d for d, version in zip(devices, results) if version in versions
+            ]
 
             if not valid_devices:
                 raise OwletDevicesError("No devices found")
@@ -443,30 +1027,75 @@ class OwletAPI:
         else:
             raise OwletError("Unexpected response type from request.")
 
-    async def activate(self, device_serial: str) -> None:
+    async def activate(
+        self,
+        device_serial: str,
+        deadline: Optional[float] = None,
+    ) -> None:
         """Sets APP_ACTIVE on the Owlet API to 1 to return properties.
 
         Parameters
         ----------
         device_serial (str):The serial number of the device being activated
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
 
         """
+        await self._coalesce(
+            ("activate", device_serial),
+            lambda: self._activate(device_serial, None),
+            deadline,
+        )
+
+    async def _activate(self, device_serial: str, deadline: Optional[float]) -> None:
         data = {"datapoint": {"metadata": {}, "value": 1}}
         await self._request(
             "POST",
             f"/dsns/{device_serial}/properties/APP_ACTIVE/datapoints.json",
             data=data,
+            deadline=deadline,
         )
+        self._activated_at[device_serial] = time.monotonic()
+
+    async def _ensure_active(
+        self,
+        device_serial: str,
+        activate: Optional[bool],
+        deadline: Optional[float],
+        cache_key: Optional[str] = None,
+    ) -> None:
+        """Activates the device unless activate is False, or activate is None and either the device was activated within the activation
+        ttl or a fresh response for cache_key is cached so no request will be sent."""
+        if activate is None and self.cache is not None and cache_key is not None:
+            if self.cache.fresh(cache_key):
+                self._record("activations_skipped")
+                return
+        if activate is None:
+            activated_at = self._activated_at.get(device_serial)
+            activate = (
+                activated_at is None
+                or time.monotonic() - activated_at >= self._activation_ttl
+            )
+            if not activate:
+                self._record("activations_skipped")
+        if activate:
+            await self.activate(device_serial, deadline)
 
     async def get_properties(
         self,
         device: str,
+        deadline: Optional[float] = None,
+        activate: Optional[bool] = None,
+        names: Optional[Iterable[str]] = None,
     ) -> PropertiesResponse:
         """Gets the properties from the Owlet API for a given device.
 
         Parameters
         ----------
         device (str):The serial number of the device to get the properties of
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
+        activate (bool), optional:True always activates the device first, False never does, None activates unless it was activated within
+        the activation ttl
+        names (Iterable[str]), optional:Only fetch the properties with these names, None fetches every property
 
         Returns
         -------
@@ -474,43 +1103,265 @@ class OwletAPI:
 
         """
         properties = {}
-        await self.activate(device)
+        url = f"/dsns/{device}/properties.json"
+        params = [("names[]", name) for name in names] if names is not None else None
+        await self._ensure_active(
+            device, activate, deadline, self._cache_key(url, params)
+        )
         api_response = await self._request(
             "GET",
-            f"/dsns/{device}/properties.json",
+            url,
+            deadline=deadline,
+            params=params,
         )
-        for property in api_response:
+        # A filtered request for names the device does not have returns an empty list
+        for property in api_response or []:
             properties[property["property"]["name"]] = property["property"]
 
-            response: PropertiesResponse = {
-                "response": properties,
-            }
+        response: PropertiesResponse = {
+            "response": properties,
+        }
+
+        if self._tokens_changed:
+            response["tokens"] = self.tokens
+        return response
+
+    async def get_property(
+        self,
+        device: str,
+        name: str,
+        deadline: Optional[float] = None,
+        activate: Optional[bool] = None,
+    ) -> PropertyResponse:
+        """Gets a single property from the Owlet API for a given device, far smaller than fetching every property.
+
+        Parameters
+        ----------
+        device (str):The serial number of the device to get the property of
+        name (str):The name of the property, e.g. REAL_TIME_VITALS
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
+        activate (bool), optional:Works as in get_properties
+
+        Returns
+        -------
+        (dict):A dictionary containing the property, in the same form as each property returned by get_properties
 
+        """
+        url = f"/dsns/{device}/properties/{name}.json"
+        await self._ensure_active(device, activate, deadline, self._cache_key(url))
+        api_response = await self._request(
+            "GET",
+            url,
+            deadline=deadline,
+        )
+        response: PropertyResponse = {"response": api_response["property"]}
         if self._tokens_changed:
             response["tokens"] = self.tokens
         return response
 
+    async def iter_datapoints(
+        self,
+        device: str,
+        name: str,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None,
+        per_page: int = 100,
+        deadline: Optional[float] = None,
+    ) -> AsyncGenerator[Datapoint, None]:
+        """Yields the datapoints recorded for a property of a device, oldest first, e.g. a night of REAL_TIME_VITALS.
+
+        Only one page is held at a time, the next page is fetched while the current one is being consumed. Closing the generator
+        early with aclose cancels the page being fetched.
+
+        Parameters
+        ----------
+        device (str):The serial number of the device
+        name (str):The name of the property, e.g. REAL_TIME_VITALS
+        since (datetime), optional:Only datapoints created at or after this time, naive datetimes are taken as UTC
+        until (datetime), optional:Only datapoints created before this time, naive datetimes are taken as UTC
+        per_page (int), optional:Datapoints fetched with each request
+        deadline (float), optional:time.monotonic() value by which every page must have been fetched, once passed OwletTimeoutError is raised
+
+        Yields
+        -------
+        (dict):Each datapoint with its value, created_at, updated_at and metadata
+
+        """
+        url = f"/dsns/{device}/properties/{name}/datapoints.json"
+        params = [
+            ("paginated", "true"),
+            ("is_forward_page", "true"),
+            ("per_page", str(per_page)),
+        ]
+        if since is not None:
+            params.append(("filter[created_at_since_date]", self._format_time(since)))
+        if until is not None:
+            params.append(("filter[created_at_end_date]", self._format_time(until)))
+
+        def fetch(page: int) -> "asyncio.Task[Any]":
+            return asyncio.create_task(
+                self._request(
+                    "GET",
+                    url,
+                    deadline=deadline,
+                    params=params + [("page", str(page))],
+                )
+            )
+
+        page = 1
+        pending: Optional[asyncio.Task[Any]] = fetch(page)
+        try:
+            while pending is not None:
+                api_response = await pending
+                pending = None
+                if api_response is None or isinstance(api_response, list):
+                    # Not paginated, the whole history came back at once, or an empty body with nothing to return
+                    datapoints = api_response or []
+                else:
+                    datapoints = api_response.get("datapoints") or []
+                    if datapoints and (api_response.get("meta") or {}).get("next_page"):
+                        page += 1
+                        pending = fetch(page)
+                for datapoint in datapoints:
+                    yield datapoint["datapoint"]
+        finally:
+            if pending is not None:
+                pending.cancel()
+                with contextlib.suppress(BaseException):
+                    await pending
+
+    @staticmethod
+    def _format_time(value: datetime.datetime) -> str:
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
     async def post_command(
         self,
         device: str,
         command: str,
         data: dict[str, Any],
+        deadline: Optional[float] = None,
+        activate: Optional[bool] = None,
     ) -> Any:
-        """Send a command to the Owlet API and return the response."""
-        await self.activate(device)
+        """Send a command to the Owlet API and return the response, activate works as in get_properties."""
+        await self._ensure_active(device, activate, deadline)
         response = await self._request(
             "POST",
             f"/dsns/{device}/properties/{command}/datapoints.json",
             data,
+            deadline=deadline,
         )
 
         return response
 
+    @contextlib.asynccontextmanager
+    async def _open(
+        self,
+        method: str,
+        url: str,
+        deadline: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Opens a request to any Owlet or Ayla endpoint, checking the endpoint's circuit breaker and waiting on the rate limiter first
+        if they are enabled. The request timeout is cut down to the time left before the deadline.
+        """
+        endpoint = self._endpoint_class(url)
+        breaker = self._breakers.get(endpoint)
+        if breaker and not breaker.allow():
+            self._record("circuit_open_rejections")
+            raise OwletCircuitOpenError(f"Circuit breaker open for {endpoint} requests")
+
+        recorded = breaker is None
+        # Everything after allow is inside the try, so a half open probe slot is released however the request ends
+        try:
+            if self._rate_limiter:
+                try:
+                    waited = await asyncio.wait_for(
+                        self._rate_limiter.acquire(
+                            urlsplit(url).netloc,
+                            self._account or self._region,
+                        ),
+                        self._remaining(deadline),
+                    )
+                except asyncio.TimeoutError as err:
+                    raise OwletTimeoutError(
+                        "Deadline passed waiting on the rate limiter"
+                    ) from err
+                if waited > 0:
+                    self._record("rate_limited_requests")
+                    self._record("rate_limit_wait_seconds", waited)
+
+            timeout = self._request_timeout(deadline)
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+
+            async with self.session.request(method, url, **kwargs) as response:
+                # Only server side failures count against the breaker, a 4xx says the endpoint is up
+                if breaker and not recorded:
+                    if response.status >= 500 or response.status == 429:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    recorded = True
+                yield response
+        except asyncio.TimeoutError as err:
+            if breaker and not recorded:
+                breaker.record_failure()
+                recorded = True
+            self._record("request_timeouts")
+            raise OwletTimeoutError(
+                f"Request to {endpoint} endpoint timed out"
+            ) from err
+        except aiohttp.ClientError:
+            if breaker and not recorded:
+                breaker.record_failure()
+                recorded = True
+            raise
+        finally:
+            if breaker and not recorded:
+                breaker.release()
+
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        """Returns the seconds left before the deadline, None if there is no deadline, raises OwletTimeoutError once it has passed."""
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise OwletTimeoutError("Deadline exceeded")
+        return remaining
+
+    def _request_timeout(
+        self, deadline: Optional[float]
+    ) -> Optional[aiohttp.ClientTimeout]:
+        remaining = self._remaining(deadline)
+        if remaining is None:
+            return self._timeout
+        timeout = self._timeout or self.session.timeout
+        return aiohttp.ClientTimeout(
+            total=min(timeout.total, remaining) if timeout.total else remaining,
+            connect=timeout.connect,
+            sock_read=timeout.sock_read,
+            sock_connect=timeout.sock_connect,
+        )
+
+    def _endpoint_class(self, url: str) -> str:
+        if not url.startswith(self._api_url):
+            return "auth"
+        path = urlsplit(url).path
+        if path.endswith("/datapoints.json"):
+            return "datapoints"
+        if "/properties" in path:
+            return "properties"
+        return "devices"
+
     async def _request(
         self,
         method: str,
         url: str,
         data: Optional[dict[str, Any]] = None,
+        deadline: Optional[float] = None,
+        params: Optional[list[tuple[str, str]]] = None,
     ) -> Any:
         """Send a request to the Owlet API and return the response.
 
@@ -519,21 +1370,187 @@ class OwletAPI:
         method (str):The method to call, either 'GET' or 'POST'
         url (str):The API url to call against
         data (dict):A dictionary with the data to send to the API.
+        deadline (float), optional:time.monotonic() value by which the call must finish, once passed OwletTimeoutError is raised
+        params (list), optional:Query string parameters as (name, value) pairs
 
         Returns
         -------
-        dict: Dictionary containing the response
+        dict: Dictionary containing the response, concurrent identical GETs share one request and its response, as do hits on the cache,
+        so it must not be modified
 
         """
-        await self.validate_authentication()
+        if method == "GET" and data is None:
+            key = self._cache_key(url, params)
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    self._record("cache_hits")
+                    return cached
+                self._record("cache_misses")
+            return await self._coalesce(
+                key,
+                lambda: self._fetch(key, url, None, params),
+                deadline,
+            )
 
-        async with self.session.request(
-            method,
-            self._api_url + url,
-            headers=self.headers,
-            json=data,
-        ) as response:
-            if response.status not in (200, 201):
-                raise OwletConnectionError("Error sending request")
+        response = await self._send(method, url, data, deadline, params)
+        if self.cache is not None and method == "POST":
+            parts = url.split("/")
+            # Activating a device does not change what it reports
+            if len(parts) > 2 and parts[1] == "dsns" and "APP_ACTIVE" not in parts:
+                self.cache.invalidate(parts[2])
+        return response
+
+    @staticmethod
+    def _cache_key(url: str, params: Optional[list[tuple[str, str]]] = None) -> str:
+        return f"{url}?{urlencode(params)}" if params else url
+
+    async def _fetch(
+        self,
+        key: str,
+        url: str,
+        deadline: Optional[float],
+        params: Optional[list[tuple[str, str]]],
+    ) -> Any:
+        response = await self._send("GET", url, None, deadline, params)
+        if self.cache is not None:
+            self.cache.set(key, self._endpoint_class(self._api_url + url), response)
+        return response
+
+    async def _coalesce(
+        self,
+        key: Hashable,
+        call: Callable[[], Coroutine[Any, Any, Any]],
+        deadline: Optional[float],
+    ) -> Any:
+        """Runs call once for all concurrent callers with the same key, every caller gets its result or exception.
+
+        As with _single_flight the shared call runs under the configured request timeout, not the deadline of the caller that
+        started it, and is shielded from any one caller being cancelled or timing out. Each caller waits no longer than its own
+        deadline, and the call is cancelled once every caller waiting on it has gone.
+        """
+        remaining = self._remaining(deadline)
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(call()))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda task: self._flight_done(key, task))
+        else:
+            self._record("requests_coalesced")
+        flight.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), remaining)
+        except asyncio.TimeoutError as err:
+            raise OwletTimeoutError(
+                "Request did not finish before the deadline"
+            ) from err
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Forget the flight before cancelling it, a caller arriving before the done callback runs starts a new one
+                if self._in_flight.get(key) is flight:
+                    del self._in_flight[key]
+                flight.task.cancel()
+
+    def _flight_done(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        flight = self._in_flight.get(key)
+        if flight is not None and flight.task is task:
+            del self._in_flight[key]
+        # Mark the exception retrieved, the waiters have already been given it
+        if not task.cancelled():
+            task.exception()
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        data: Optional[dict[str, Any]],
+        deadline: Optional[float],
+        params: Optional[list[tuple[str, str]]],
+    ) -> Any:
+        await self._load_tokens()
+        if self._validate_requests:
+            await self.validate_authentication(deadline)
+        else:
+            await self.authenticate(deadline)
+
+        retry_auth = not self._validate_requests
+        attempt = 0
+        delay = 0.0
+        if self._retry:
+            self._retry.record_request()
+        while True:
+            attempt += 1
+            self._record("request_attempts")
+            sent_token = self._auth_token
+            status: Optional[int] = None
+            retry_after: Optional[str] = None
+            try:
+                async with self._open(
+                    method,
+                    self._api_url + url,
+                    deadline=deadline,
+                    headers=self.headers,
+                    json=data,
+                    params=params,
+                ) as response:
+                    status = response.status
+                    if status in (200, 201):
+                        return await self._read_json(response)
+                    retry_after = response.headers.get("Retry-After")
+                error = OwletConnectionError(f"Error sending request, status {status}")
+                cause: Optional[BaseException] = None
+            except OwletTimeoutError as err:
+                error = err
+                cause = err.__cause__
+            except aiohttp.ClientError as err:
+                error = OwletConnectionError(f"Error sending request: {err}")
+                cause = err
+
+            if status == 401 and retry_auth:
+                logger.debug("Auth token rejected for %s, reauthenticating", url)
+                retry_auth = False
+                attempt -= 1
+                await self._reauthenticate(sent_token, deadline)
+                continue
+
+            self._record("request_failures")
+            next_delay = self._retry_delay(
+                method, attempt, status, retry_after, delay, deadline
+            )
+            if next_delay is None:
+                raise error from cause
+            logger.debug(
+                "Retrying %s %s in %.2fs after %s",
+                method,
+                url,
+                next_delay,
+                status or error,
+            )
+            delay = next_delay
+            await asyncio.sleep(delay)
 
-            return await response.json()
+    def _retry_delay(
+        self,
+        method: str,
+        attempt: int,
+        status: Optional[int],
+        retry_after: Optional[str],
+        previous: float,
+        deadline: Optional[float],
+    ) -> Optional[float]:
+        """Returns how long to wait before retrying a failed attempt, or None if it should not be retried."""
+        if self._retry is None or not self._retry.can_retry(method, attempt, status):
+            return None
+        delay = self._retry.next_delay(previous, status, retry_after)
+        if delay is None:
+            return None
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            # The retry could not finish in time
+            return None
+        if not self._retry.take_retry():
+            self._record("retry_budget_exhausted")
+            return None
+        self._record("request_retries")
+        self._record("retry_delay_seconds", delay)
+        return delay
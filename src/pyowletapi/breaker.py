@@ -0,0 +1,89 @@
+import time
+from typing import Literal, TypedDict
+
+BreakerState = Literal["closed", "open", "half_open"]
+
+
+class BreakerConfig(TypedDict, total=False):
+    failure_threshold: int
+    reset_timeout: float
+    half_open_max: int
+
+
+class CircuitBreaker:
+    """A circuit breaker for one class of endpoint.
+
+    The breaker opens after failure_threshold consecutive failures, while open requests fail fast without being sent. Once
+    reset_timeout has passed it is half open and lets up to half_open_max probe requests through, a successful probe closes
+    it again and a failed probe opens it for another reset_timeout.
+
+    Attributes
+    ----------
+    failure_threshold : int
+        Consecutive failures that open the breaker
+    reset_timeout : float
+        Seconds the breaker stays open before probing
+    half_open_max : int
+        Probe requests allowed at once while half open
+
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        half_open_max: int = 1,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self._state: BreakerState = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> BreakerState:
+        if (
+            self._state == "open"
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            return "half_open"
+        return self._state
+
+    def allow(self) -> bool:
+        """Returns True if a request may be sent, a request allowed while half open counts as a probe until it is recorded."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open":
+            return False
+        self._state = "half_open"
+        if self._probes >= self.half_open_max:
+            return False
+        self._probes += 1
+        return True
+
+    def record_success(self) -> None:
+        self._state = "closed"
+        self._failures = 0
+        self._probes = 0
+
+    def record_failure(self) -> None:
+        if self._state == "half_open":
+            self._open()
+            return
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._open()
+
+    def release(self) -> None:
+        """Frees a probe slot for a request that ended without a result, e.g. because it was cancelled."""
+        if self._state == "half_open" and self._probes > 0:
+            self._probes -= 1
+
+    def _open(self) -> None:
+        self._state = "open"
+        self._opened_at = time.monotonic()
+        self._failures = 0
+        self._probes = 0
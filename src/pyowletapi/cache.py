@@ -0,0 +1,101 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional, TypedDict
+
+DEFAULT_TTLS: dict[str, float] = {"devices": 300, "properties": 5, "datapoints": 0}
+
+
+class CacheStats(TypedDict):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+
+
+class ResponseCache:
+    """An LRU cache of Owlet API GET responses, each kept for the time to live of its endpoint class.
+
+    Entries are keyed by path and query string. The device list changes rarely and can be kept for minutes, properties only for
+    a few seconds. Once max_entries is reached the least recently used entry is evicted.
+
+    Attributes
+    ----------
+    max_entries : int
+        Most responses held at once
+    ttls : dict
+        Seconds a response is kept for each endpoint class (devices, properties, datapoints), 0 or missing means it is not cached
+
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttls: Optional[dict[str, float]] = None,
+    ) -> None:
+        """Constructs a response cache.
+
+        Parameters
+        ----------
+        max_entries (int), optional:Most responses held at once
+        ttls (dict), optional:Time to live for each endpoint class, merged over DEFAULT_TTLS
+
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        """Returns the hit, miss and eviction counts and the number of entries held"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+    def _lookup(self, key: str) -> Optional[tuple[float, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def fresh(self, key: str) -> bool:
+        """Returns True if an unexpired response is held for key, without counting a hit or miss."""
+        return self._lookup(key) is not None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the unexpired response held for key, or None."""
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, endpoint: str, value: Any) -> None:
+        """Holds value for the time to live of endpoint, does nothing if that endpoint class is not cached."""
+        ttl = self.ttls.get(endpoint, 0)
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, device: Optional[str] = None) -> None:
+        """Drops every response for the given device serial, or every response when device is None."""
+        if device is None:
+            self._entries.clear()
+            return
+        prefix = f"/dsns/{device}/"
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
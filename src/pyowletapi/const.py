@@ -152,8 +152,39 @@ VITALS_2: dict[type, dict[PropertyKey, str]] = {
     },
 }
 
+# Raw property names read when normalising each sock version, so only these need to be fetched
+PROPERTY_NAMES: dict[int, tuple[str, ...]] = {
+    3: tuple(
+        sorted(
+            {name for table in PROPERTIES.values() for name in table.values()}
+            | {"REAL_TIME_VITALS", "oem_sock_version"}
+        )
+    ),
+    2: tuple(
+        sorted(
+            {name for table in PROPERTIES.values() for name in table.values()}
+            | {name for table in VITALS_2.values() for name in table.values()}
+        )
+    ),
+}
+
+# Alerts that keep Sock.stream polling at its shortest interval while raised
+ALERT_KEYS: frozenset[PropertyKey] = frozenset(
+    key for key in PROPERTIES[bool] if key.endswith("_alert")
+)
+
+# A property only each sock version reports, checked in order to tell the versions apart
+VERSION_PROPERTIES: dict[str, int] = {"REAL_TIME_VITALS": 3, "CHARGE_STATUS": 2}
+
+# Names fetched before the sock version is known, covers every version and the properties used to tell them apart
+PROPERTY_NAMES_ANY: tuple[str, ...] = tuple(
+    sorted({name for names in PROPERTY_NAMES.values() for name in names})
+)
+
 REGION_INFO: dict[str, dict[str, str]] = {
     "world": {
+        "url_password": "https://www.googleapis.com/identitytoolkit/v3/relyingparty/verifyPassword",
+        "url_securetoken": "https://securetoken.googleapis.com/v1/token",
         "url_mini": "https://ayla-sso.owletdata.com/mini/",
         "url_signin": "https://user-field-1a2039d9.aylanetworks.com/api/v1/token_sign_in",
         "url_refresh": "https://user-field-1a2039d9.aylanetworks.com/users/refresh_token.json",
@@ -163,6 +194,8 @@ REGION_INFO: dict[str, dict[str, str]] = {
         "app_secret": "sso-prod-UEjtnPCtFfjdwIwxqnC0OipxRFU",
     },
     "europe": {
+        "url_password": "https://www.googleapis.com/identitytoolkit/v3/relyingparty/verifyPassword",
+        "url_securetoken": "https://securetoken.googleapis.com/v1/token",
         "url_mini": "https://ayla-sso.eu.owletdata.com/mini/",
         "url_signin": "https://user-field-eu-1a2039d9.aylanetworks.com/api/v1/token_sign_in",
         "url_refresh": "https://user-field-eu-1a2039d9.aylanetworks.com/users/refresh_token.json",
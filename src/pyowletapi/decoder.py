@@ -0,0 +1,174 @@
+import datetime
+import functools
+from typing import Any, Callable, Collection, cast
+
+from .codec import JsonLoads
+from .const import (
+    PROPERTIES,
+    VITALS_2,
+    VITALS_3,
+    VITALS_3_OTHER,
+    Properties,
+    PropertyKey,
+)
+
+Converter = Callable[[Any], Any]
+DecoderEntry = tuple[PropertyKey, str, Converter]
+
+_MISSING = object()
+
+
+def _unchanged(value: Any) -> Any:
+    return value
+
+
+@functools.lru_cache(maxsize=256)
+def _format_updated_at(value: str) -> str:
+    # Every poll until the sock next reports carries the same timestamp, so most calls are cache hits
+    return datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").strftime(
+        "%Y/%m/%d %H:%M:%S"
+    )
+
+
+def _compile(
+    tables: dict[type, dict[PropertyKey, str]],
+    overrides: dict[PropertyKey, Converter],
+) -> tuple[DecoderEntry, ...]:
+    return tuple(
+        (key, source, overrides.get(key, data_type))
+        for data_type, table in tables.items()
+        for key, source in table.items()
+    )
+
+
+class PropertyDecoder:
+    """Turns the raw properties of one sock version into Properties.
+
+    The PROPERTIES and VITALS tables are flattened once into (output key, source key, converter) entries, so decoding is a single
+    pass of dictionary lookups. Decoders hold no state of their own and are shared by every sock of a version, see decoder_for.
+
+    Attributes
+    ----------
+    version : int
+        The sock version decoded, 0 when unknown in which case only the common properties are decoded
+    properties : tuple
+        Entries read from the value of a raw property
+    vitals : tuple
+        Entries for the vitals, read from the REAL_TIME_VITALS json on a v3 sock and from raw properties on a v2 sock
+    keys : tuple
+        Every key the decoder can output, in the order decode adds them
+
+    """
+
+    def __init__(self, version: int) -> None:
+        self.version = version
+        self.properties = _compile(PROPERTIES, {})
+        if version == 3:
+            # bso is passed through as reported rather than converted to bool
+            self.vitals = _compile(VITALS_3, {"base_station_on": _unchanged})
+        elif version == 2:
+            self.vitals = _compile(VITALS_2, {})
+        else:
+            self.vitals = ()
+        self.keys: tuple[PropertyKey, ...] = tuple(
+            key for key, _, _ in self.properties + self.vitals
+        ) + (tuple(VITALS_3_OTHER) if version == 3 else ())
+
+    def decode(
+        self,
+        raw_properties: dict[str, dict[str, Any]],
+        json_loads: JsonLoads,
+    ) -> Properties:
+        """Returns the Properties decoded from raw_properties, json_loads decodes the REAL_TIME_VITALS of a v3 sock."""
+        properties: dict[str, Any] = {}
+        for key, source, convert in self.properties:
+            raw = raw_properties.get(source)
+            if raw is not None and "value" in raw:
+                properties[key] = convert(raw["value"])
+        self._decode_vitals(raw_properties, properties, json_loads)
+        return cast(Properties, properties)
+
+    def decode_vitals(
+        self,
+        raw_properties: dict[str, dict[str, Any]],
+        properties: Properties,
+        json_loads: JsonLoads,
+    ) -> None:
+        """Adds only the vitals decoded from raw_properties to properties."""
+        self._decode_vitals(
+            raw_properties, cast(dict[str, Any], properties), json_loads
+        )
+
+    def _decode_vitals(
+        self,
+        raw_properties: dict[str, dict[str, Any]],
+        output: dict[str, Any],
+        json_loads: JsonLoads,
+    ) -> None:
+        if self.version == 3:
+            real_time_vitals = raw_properties["REAL_TIME_VITALS"]
+            vitals = json_loads(real_time_vitals["value"])
+            for key, source, convert in self.vitals:
+                if source in vitals:
+                    output[key] = convert(vitals[source])
+            if "data_updated_at" in real_time_vitals:
+                output["last_updated"] = _format_updated_at(
+                    real_time_vitals["data_updated_at"]
+                )
+        elif self.version == 2:
+            for key, source, convert in self.vitals:
+                raw = raw_properties.get(source)
+                if raw is not None and "value" in raw:
+                    output[key] = convert(raw["value"])
+
+    def decode_changed(
+        self,
+        raw_properties: dict[str, dict[str, Any]],
+        previous: Properties,
+        changed: Collection[str],
+        json_loads: JsonLoads,
+    ) -> tuple[Properties, set[PropertyKey]]:
+        """Decodes only the output keys read from the raw properties named in changed, the rest are carried over from previous.
+
+        Returns
+        -------
+        (tuple):The Properties, the same as decode would return, and the set of keys whose values differ from previous
+
+        """
+        fresh: dict[str, Any] = {}
+        stale: set[PropertyKey] = set()
+        entries = (
+            self.properties + self.vitals if self.version == 2 else self.properties
+        )
+        for key, source, convert in entries:
+            if source in changed:
+                stale.add(key)
+                raw = raw_properties.get(source)
+                if raw is not None and "value" in raw:
+                    fresh[key] = convert(raw["value"])
+        if self.version == 3 and "REAL_TIME_VITALS" in changed:
+            stale.update(key for key, _, _ in self.vitals)
+            stale.update(VITALS_3_OTHER)
+            self._decode_vitals(raw_properties, fresh, json_loads)
+
+        properties: dict[str, Any] = {}
+        for key in self.keys:
+            value = (
+                fresh.get(key, _MISSING)
+                if key in stale
+                else previous.get(key, _MISSING)
+            )
+            if value is not _MISSING:
+                properties[key] = value
+        updated = {
+            key
+            for key in stale
+            if fresh.get(key, _MISSING) != previous.get(key, _MISSING)
+        }
+        return cast(Properties, properties), updated
+
+
+@functools.lru_cache(maxsize=None)
+def decoder_for(version: int) -> PropertyDecoder:
+    """Returns the decoder shared by every sock of the given version."""
+    return PropertyDecoder(version)
@@ -16,3 +16,11 @@ class OwletCredentialsError(OwletError):
 
 class OwletDevicesError(OwletError):
     """when no devices are found."""
+
+
+class OwletCircuitOpenError(OwletConnectionError):
+    """When a circuit breaker is open after repeated failures, the request is not sent."""
+
+
+class OwletTimeoutError(OwletConnectionError):
+    """When a request times out or a call does not finish before its deadline."""
@@ -0,0 +1,305 @@
+import asyncio
+import heapq
+import inspect
+import logging
+import random
+import time
+from collections import deque
+from logging import Logger
+from typing import Any, Callable, Optional, TypedDict
+
+import aiohttp
+
+from .api import OwletAPI
+from .exceptions import OwletError
+from .sock import PropertiesDict, Sock
+
+logger: Logger = logging.getLogger(__package__)
+
+
+class SockStats(TypedDict):
+    account: str
+    polls: int
+    failures: int
+    consecutive_failures: int
+    last_success: Optional[float]
+    lag: Optional[float]
+
+
+class OwletFleet:
+    """Polls many socks across many accounts from one event loop.
+
+    Each sock is polled every interval seconds. Polls that come due are queued per account and started round robin across the
+    accounts, so one large account cannot starve the others, with at most concurrency polls running in total and at most
+    account_concurrency for any one account. First polls are spread across the interval rather than all starting at once, and
+    a due time heap means the scheduler only ever wakes for the next poll due or a poll finishing.
+
+    Attributes
+    ----------
+    interval : float
+        Seconds between the start of one poll of a sock and the next
+    concurrency : int
+        Most polls running at once across the fleet
+    account_concurrency : int
+        Most polls running at once for each account
+    poll_timeout : float
+        Seconds a poll may take before it fails with OwletTimeoutError
+
+    """
+
+    def __init__(
+        self,
+        interval: float = 30,
+        concurrency: int = 100,
+        account_concurrency: int = 4,
+        poll_timeout: Optional[float] = None,
+        on_update: Optional[Callable[[Sock, PropertiesDict], Any]] = None,
+        on_error: Optional[Callable[[Sock, BaseException], Any]] = None,
+    ) -> None:
+        """Constructs an empty fleet, add accounts with add_account then socks with discover or add_sock.
+
+        Parameters
+        ----------
+        interval (float), optional:Seconds between polls of each sock
+        concurrency (int), optional:Most polls running at once across the fleet
+        account_concurrency (int), optional:Most polls running at once for each account
+        poll_timeout (float), optional:Seconds a poll may take, defaults to interval
+        on_update (Callable), optional:Called with the sock and the result of update_properties after each successful poll, may be a
+        coroutine function
+        on_error (Callable), optional:Called with the sock and the exception after each failed poll, may be a coroutine function
+
+        """
+        if interval <= 0 or concurrency < 1 or account_concurrency < 1:
+            raise ValueError(
+                "interval must be positive and the concurrency limits at least 1"
+            )
+        self.interval = interval
+        self.concurrency = concurrency
+        self.account_concurrency = account_concurrency
+        self.poll_timeout = poll_timeout or interval
+        self._on_update = on_update
+        self._on_error = on_error
+
+        self._apis: dict[str, OwletAPI] = {}
+        self._socks: dict[str, Sock] = {}
+        self._accounts: dict[str, str] = {}
+        self._stats: dict[str, SockStats] = {}
+        # Due time heap of (due, generation, serial), entries for removed or re-added socks are skipped when popped
+        self._schedule: list[tuple[float, int, str]] = []
+        self._generation: dict[str, int] = {}
+        self._sequence = 0
+        self._ready: dict[str, deque[tuple[float, str]]] = {}
+        self._rotation: deque[str] = deque()
+        self._running: dict[str, int] = {}
+        self._polls: set[asyncio.Task[None]] = set()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._metrics: dict[str, float] = {}
+
+    @property
+    def socks(self) -> dict[str, Sock]:
+        """Returns the socks in the fleet keyed by serial number"""
+        return dict(self._socks)
+
+    @property
+    def stats(self) -> dict[str, SockStats]:
+        """Returns the poll counts and lag of every sock, lag is the seconds since its last successful poll"""
+        now = time.monotonic()
+        return {
+            serial: {
+                **stats,
+                "lag": (
+                    None
+                    if stats["last_success"] is None
+                    else now - stats["last_success"]
+                ),
+            }
+            for serial, stats in self._stats.items()
+        }
+
+    @property
+    def metrics(self) -> dict[str, float]:
+        """Returns the fleet counters, e.g. polls, poll_failures and schedule_lag_seconds, the total time polls waited past their due
+        time for a free slot, along with the polls running and queued right now"""
+        return {
+            **self._metrics,
+            "polls_running": len(self._polls),
+            "polls_queued": sum(len(ready) for ready in self._ready.values()),
+        }
+
+    def lag(self, serial: str) -> Optional[float]:
+        """Returns the seconds since the sock was last polled successfully, None if it never has been."""
+        last_success = self._stats[serial]["last_success"]
+        return None if last_success is None else time.monotonic() - last_success
+
+    def _record(self, name: str, value: float = 1) -> None:
+        self._metrics[name] = self._metrics.get(name, 0) + value
+
+    def add_account(self, name: str, api: OwletAPI) -> None:
+        """Adds an account, every sock of the account is polled through api."""
+        if name in self._apis:
+            raise OwletError(f"Account {name} already added")
+        self._apis[name] = api
+        self._ready[name] = deque()
+        self._running[name] = 0
+        self._rotation.append(name)
+
+    async def discover(self, account: Optional[str] = None) -> list[Sock]:
+        """Adds every sock returned by get_devices for the account, or for every account when account is None.
+
+        Returns
+        -------
+        (list):The socks added
+
+        """
+        accounts = [account] if account is not None else list(self._apis)
+        added = []
+        for name in accounts:
+            devices = await self._apis[name].get_devices()
+            for device in devices["response"]:
+                sock = Sock(self._apis[name], device["device"])
+                self.add_sock(name, sock)
+                added.append(sock)
+        return added
+
+    def add_sock(self, account: str, sock: Sock) -> None:
+        """Adds a sock of the account to the fleet, replacing any sock with the same serial number."""
+        if account not in self._apis:
+            raise OwletError(f"Unknown account {account}")
+        serial = sock.serial
+        self._socks[serial] = sock
+        self._accounts[serial] = account
+        self._stats[serial] = {
+            "account": account,
+            "polls": 0,
+            "failures": 0,
+            "consecutive_failures": 0,
+            "last_success": None,
+            "lag": None,
+        }
+        # Spread first polls across the interval so adding thousands of socks does not start a burst
+        self._push(serial, time.monotonic() + random.uniform(0, self.interval))
+
+    def remove_sock(self, serial: str) -> None:
+        """Stops polling the sock, a poll already running is left to finish."""
+        self._socks.pop(serial, None)
+        self._accounts.pop(serial, None)
+        self._stats.pop(serial, None)
+        self._generation.pop(serial, None)
+
+    def _push(self, serial: str, due: float) -> None:
+        self._sequence += 1
+        self._generation[serial] = self._sequence
+        heapq.heappush(self._schedule, (due, self._sequence, serial))
+        self._wake.set()
+
+    def start(self) -> None:
+        """Starts polling in a background task."""
+        if self._task and not self._task.done():
+            raise OwletError("Fleet already running")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops polling, cancelling any polls still running."""
+        tasks = list(self._polls)
+        if self._task:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Stops polling and closes the api object of every account."""
+        await self.stop()
+        for api in self._apis.values():
+            await api.close()
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            while self._schedule and self._schedule[0][0] <= now:
+                due, generation, serial = heapq.heappop(self._schedule)
+                if self._generation.get(serial) == generation:
+                    self._ready[self._accounts[serial]].append((due, serial))
+            self._dispatch()
+
+            timeout = self._schedule[0][0] - now if self._schedule else None
+            # asyncio.wait rather than wait_for, which can swallow a cancellation that lands as the wake event is set
+            waiter = asyncio.ensure_future(self._wake.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=timeout)
+            finally:
+                waiter.cancel()
+
+    def _dispatch(self) -> None:
+        """Starts queued polls, one per account per pass round the accounts, until the queues are empty or the limits are reached."""
+        started = True
+        while started and len(self._polls) < self.concurrency:
+            started = False
+            for _ in range(len(self._rotation)):
+                account = self._rotation[0]
+                self._rotation.rotate(-1)
+                ready = self._ready[account]
+                if not ready or self._running[account] >= self.account_concurrency:
+                    continue
+                due, serial = ready.popleft()
+                started = True
+                sock = self._socks.get(serial)
+                if sock is None:
+                    continue
+                self._record("schedule_lag_seconds", max(0.0, time.monotonic() - due))
+                self._running[account] += 1
+                task = asyncio.create_task(self._poll(account, serial, sock, due))
+                self._polls.add(task)
+                task.add_done_callback(self._polls.discard)
+                if len(self._polls) >= self.concurrency:
+                    return
+
+    async def _poll(self, account: str, serial: str, sock: Sock, due: float) -> None:
+        try:
+            response = await sock.update_properties(
+                deadline=time.monotonic() + self.poll_timeout
+            )
+        except (OwletError, aiohttp.ClientError) as err:
+            self._failed(serial, sock)
+            logger.warning("Polling %s failed: %s", serial, err)
+            await self._notify(self._on_error, sock, err)
+        except Exception as err:
+            self._failed(serial, sock)
+            logger.exception("Polling %s failed", serial)
+            await self._notify(self._on_error, sock, err)
+        else:
+            self._record("polls")
+            stats = self._stats.get(serial)
+            if stats is not None and self._socks.get(serial) is sock:
+                stats["polls"] += 1
+                stats["consecutive_failures"] = 0
+                stats["last_success"] = time.monotonic()
+            await self._notify(self._on_update, sock, response)
+        finally:
+            self._running[account] -= 1
+            if (
+                self._socks.get(serial) is sock
+                and self._generation.get(serial) is not None
+            ):
+                self._push(serial, max(due + self.interval, time.monotonic()))
+            self._wake.set()
+
+    def _failed(self, serial: str, sock: Sock) -> None:
+        self._record("poll_failures")
+        stats = self._stats.get(serial)
+        if stats is not None and self._socks.get(serial) is sock:
+            stats["failures"] += 1
+            stats["consecutive_failures"] += 1
+
+    async def _notify(self, callback: Optional[Callable[..., Any]], *args: Any) -> None:
+        if callback is None:
+            return
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception("Fleet callback failed")
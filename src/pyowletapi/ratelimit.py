@@ -0,0 +1,130 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """An async token bucket, tokens are added at rate per second up to capacity and each acquire takes one.
+
+    Waiters are served in arrival order, so a burst of callers is spread out smoothly rather than retried in a herd.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Constructs a token bucket that starts full.
+
+        Parameters
+        ----------
+        rate (float):Tokens added per second
+        capacity (float):Most tokens the bucket can hold, this is the largest burst allowed
+
+        """
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Takes one token, waiting until one is available.
+
+        Returns
+        -------
+        (float):Seconds spent waiting
+
+        """
+        if not self._lock.locked():
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+
+        start = time.monotonic()
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+        return time.monotonic() - start
+
+
+class RateLimiter:
+    """Limits the rate of requests to each upstream host and for each account, one limiter can be shared by many api objects.
+
+    Attributes
+    ----------
+    host_rate : float
+        Requests per second allowed to each host, None for no host limit
+    host_burst : float
+        Requests allowed in a burst to each host
+    account_rate : float
+        Requests per second allowed for each account across all hosts, None for no account limit
+    account_burst : float
+        Requests allowed in a burst for each account
+
+    """
+
+    def __init__(
+        self,
+        host_rate: Optional[float] = 10,
+        host_burst: float = 20,
+        account_rate: Optional[float] = None,
+        account_burst: float = 10,
+        host_limits: Optional[dict[str, tuple[float, float]]] = None,
+    ) -> None:
+        """Constructs a rate limiter.
+
+        Parameters
+        ----------
+        host_rate (float):Requests per second allowed to each host, None for no host limit
+        host_burst (float):Requests allowed in a burst to each host
+        account_rate (float):Requests per second allowed for each account, None for no account limit
+        account_burst (float):Requests allowed in a burst for each account
+        host_limits (dict), optional:Rate and burst for specific hosts, overriding host_rate and host_burst
+
+        """
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.account_rate = account_rate
+        self.account_burst = account_burst
+        self._host_limits = host_limits or {}
+        self._hosts: dict[str, TokenBucket] = {}
+        self._accounts: dict[str, TokenBucket] = {}
+
+    def _host_bucket(self, host: str) -> Optional[TokenBucket]:
+        if host not in self._hosts:
+            rate, burst = self._host_limits.get(host, (self.host_rate, self.host_burst))
+            if rate is None:
+                return None
+            self._hosts[host] = TokenBucket(rate, burst)
+        return self._hosts[host]
+
+    def _account_bucket(self, account: str) -> Optional[TokenBucket]:
+        if self.account_rate is None:
+            return None
+        if account not in self._accounts:
+            self._accounts[account] = TokenBucket(self.account_rate, self.account_burst)
+        return self._accounts[account]
+
+    async def acquire(self, host: str, account: str) -> float:
+        """Waits until a request to host for account is allowed.
+
+        Returns
+        -------
+        (float):Seconds spent waiting
+
+        """
+        waited = 0.0
+        for bucket in (self._account_bucket(account), self._host_bucket(host)):
+            if bucket:
+                waited += await bucket.acquire()
+        return waited
@@ -0,0 +1,108 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+RETRY_STATUSES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS: frozenset[str] = frozenset(
+    {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+)
+
+
+class RetryPolicy:
+    """Decides whether and when a failed request to the Owlet API is retried.
+
+    Only idempotent methods are retried, after a network error or a status in RETRY_STATUSES. Delays use decorrelated
+    jitter, a Retry-After header on a 429 or 503 response is honoured instead. Each policy holds a retry budget: every
+    request adds budget_ratio to it and every retry takes one from it, so during an outage retries stay a small fraction of
+    traffic rather than multiplying it. A policy should not be shared between api objects unless they should share a budget.
+
+    Attributes
+    ----------
+    max_attempts : int
+        Maximum number of attempts per request, including the first
+    base_delay : float
+        Smallest delay in seconds between attempts
+    max_delay : float
+        Largest delay in seconds between attempts, a longer Retry-After means the request is not retried
+    budget_ratio : float
+        Retries earned by each request
+    budget_max : float
+        Most retries that can be saved up, the budget starts full
+
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30,
+        budget_ratio: float = 0.1,
+        budget_max: float = 10,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_max = budget_max
+        self._budget = budget_max
+
+    @property
+    def budget(self) -> float:
+        """Returns the number of retries currently available"""
+        return self._budget
+
+    def record_request(self) -> None:
+        self._budget = min(self.budget_max, self._budget + self.budget_ratio)
+
+    def can_retry(self, method: str, attempt: int, status: Optional[int]) -> bool:
+        """Returns True if a request that failed on the given attempt with the given status, or None for a network error,
+        may be tried again. The retry budget is not touched."""
+        if attempt >= self.max_attempts or method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        return status is None or status in RETRY_STATUSES
+
+    def take_retry(self) -> bool:
+        """Takes one retry from the budget, returns False if the budget is exhausted."""
+        if self._budget < 1:
+            return False
+        self._budget -= 1
+        return True
+
+    def next_delay(
+        self,
+        previous: float,
+        status: Optional[int] = None,
+        retry_after: Optional[str] = None,
+    ) -> Optional[float]:
+        """Returns the delay before the next attempt, or None if the server asked for a longer wait than max_delay.
+
+        Parameters
+        ----------
+        previous (float):The previous delay, 0 before the first retry
+        status (int):The status of the failed attempt, None for a network error
+        retry_after (str):The Retry-After header of the failed attempt if there was one
+
+        """
+        if status in (429, 503) and retry_after:
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                return delay if delay <= self.max_delay else None
+        return min(
+            self.max_delay,
+            random.uniform(self.base_delay, max(self.base_delay, previous * 3)),
+        )
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """Parses a Retry-After header given either in seconds or as an http date, returns the delay in seconds."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -1,11 +1,30 @@
 import logging
 from logging import Logger
+import asyncio
 import json
-import datetime
 import time
 from .api import OwletAPI, TokenDict, SockData
-from .const import PROPERTIES, VITALS_3, VITALS_2, PropertyKey, Properties
-from typing import Union, TypedDict, NotRequired, Any, Optional
+from .decoder import decoder_for
+from .subscription import ChangeEvent, OverflowPolicy, PropertyChange, Subscription
+from .const import (
+    ALERT_KEYS,
+    PROPERTY_NAMES,
+    PROPERTY_NAMES_ANY,
+    VERSION_PROPERTIES,
+    VITALS_2,
+    PropertyKey,
+    Properties,
+)
+from typing import (
+    Union,
+    TypedDict,
+    NotRequired,
+    Any,
+    Optional,
+    Callable,
+    Iterable,
+    AsyncIterator,
+)
 
 logger: Logger = logging.getLogger(__package__)
 
@@ -13,6 +32,7 @@ logger: Logger = logging.getLogger(__package__)
 class PropertiesDict(TypedDict):
     raw_properties: dict[str, dict[str, Any]]
     properties: Properties
+    changed: set[PropertyKey]
     tokens: NotRequired[TokenDict]
 
 
@@ -54,10 +74,15 @@ class Sock:
         returns a specific property for the device
     get_properties:
         returns all the properties for the current device
-    normalise_properties:
-        takes the raw_properties and strips out only the most important properties making the dict object smaller and easier to use
     update_properties
-        uses the OwletAPI object to call the Owlet server and return the current properties of the device.
+        uses the OwletAPI object to call the Owlet server and return the current properties of the device, decoding the raw properties
+        with the decoder for the sock version into the smaller properties dict
+    update_vitals
+        fetches only the vitals of the device and updates the vitals in properties, cheap enough to poll far more often
+    subscribe
+        returns a Subscription receiving the old and new values of the properties changed by each update
+    stream
+        async iterator of updates, polling faster while the vitals are changing and slower while the sock is idle
 
     """
 
@@ -85,8 +110,10 @@ class Sock:
         self._connection_status: str = data.get("connection_status", "Unknown")
         self._device_type: str = data.get("device_type", "Wifi")
         self._manuf_model: str = data.get("manuf_model", "Unknown")
-        self._version: Union[int, None] = None
+        self._version: Union[int, None] = api.device_version(self._serial)
         self._revision = None
+        self._decoded_version: Optional[int] = None
+        self._subscriptions: list[Subscription] = []
 
         self._raw_properties: dict[str, dict[str, Any]] = {}
         self._properties: Properties = {}
@@ -165,109 +192,139 @@ class Sock:
         """
         return self._properties[property]
 
-    async def _normalise_properties(
+    async def _renormalise(
+        self, previous: dict[str, dict[str, Any]]
+    ) -> set[PropertyKey]:
+        """Re-decodes only the raw properties whose data_updated_at differs from previous, the raw properties last seen, and returns
+        the normalised keys whose values changed, which are published to any subscriptions. Everything is decoded the first time and
+        whenever the sock version changes."""
+        version = self._version or 0
+        if version != self._decoded_version:
+            changed = set(self._raw_properties) | set(previous)
+            self._decoded_version = version
+        else:
+            changed = {
+                name
+                for name, raw in self._raw_properties.items()
+                if raw.get("data_updated_at") is None
+                or previous.get(name, {}).get("data_updated_at")
+                != raw["data_updated_at"]
+            }
+            changed.update(
+                name for name in previous if name not in self._raw_properties
+            )
+        if not changed:
+            return set()
+        old_properties = self._properties
+        self._properties, updated = decoder_for(version).decode_changed(
+            self._raw_properties,
+            old_properties,
+            changed,
+            self._api.json_loads,
+        )
+        if updated and self._subscriptions:
+            changes: dict[PropertyKey, PropertyChange] = {
+                key: {"old": old_properties.get(key), "new": self._properties.get(key)}
+                for key in updated
+            }
+            for subscription in list(self._subscriptions):
+                await subscription.publish(changes)
+        return updated
+
+    def subscribe(
         self,
-    ) -> Properties:
-        """Takes the raw properties dictionary returned from the API and formats it into another dict that is more stripped down and easier to work with.
+        callback: Optional[Callable[[ChangeEvent], Any]] = None,
+        keys: Optional[Iterable[PropertyKey]] = None,
+        maxsize: int = 100,
+        overflow: OverflowPolicy = "drop_oldest",
+    ) -> Subscription:
+        """Subscribes to the changes made to properties by update_properties and update_vitals, from the next update on.
 
         Parameters
         ----------
-            raw_properties (dict[str:dict]):The raw properties returned from the API call
+        callback (Callable), optional:Called with each ChangeEvent, a coroutine is awaited before the update returns. Without a callback
+        events are queued on the returned Subscription to be read with get or async for
+        keys (Iterable[str]), optional:Only deliver changes to these property keys, None delivers every key
+        maxsize (int), optional:Most events queued while waiting to be read
+        overflow (str), optional:drop_oldest discards the oldest queued event when the queue is full, coalesce merges the new event into
+        the newest queued one
 
         Returns
         -------
-            (dict):Returns the stripped down properties as a dict
+        (Subscription):The subscription, call its close method to stop receiving changes
 
         """
-        properties: Properties = {}
-
-        for data_type, properties_tmp in PROPERTIES.items():
-            for key, property in properties_tmp.items():
-                try:
-                    properties[key] = data_type(
-                        self._raw_properties[property]["value"],
-                    )
-                except KeyError:
-                    pass
-
-        if self._version == 3:
-            vitals = json.loads(
-                self._raw_properties["REAL_TIME_VITALS"]["value"],
-            )
-
-            for data_type, vitals_list in VITALS_3.items():
-                for vital_desc, vital_key in vitals_list.items():
-                    match vital_desc:
-                        case "base_station_on":
-                            try:
-                                properties[vital_desc] = vitals["bso"]
-                            except KeyError:
-                                pass
-                        case _:
-                            try:
-                                properties[vital_desc] = data_type(
-                                    vitals[vital_key],
-                                )
-                            except KeyError:
-                                pass
-
-            try:
-                properties["last_updated"] = datetime.datetime.strptime(
-                    self._raw_properties["REAL_TIME_VITALS"]["data_updated_at"],
-                    "%Y-%m-%dT%H:%M:%SZ",
-                ).strftime("%Y/%m/%d %H:%M:%S")
-            except KeyError:
-                pass
-
-        if self._version == 2:
-            for data_type, vitals_list in VITALS_2.items():
-                for vital_desc, vital_key in vitals_list.items():
-                    try:
-                        properties[vital_desc] = data_type(
-                            self._raw_properties[vital_key]["value"],
-                        )
-                    except KeyError:
-                        pass
-
-        return properties
+        subscription = Subscription(
+            self.serial,
+            callback,
+            keys,
+            maxsize,
+            overflow,
+            on_close=self._subscriptions.remove,
+        )
+        self._subscriptions.append(subscription)
+        return subscription
 
     async def _check_version(self) -> None:
-        version = 0
-        if "REAL_TIME_VITALS" in self._raw_properties:
-            version = 3
-        elif "CHARGE_STATUS" in self._raw_properties:
-            version = 2
-        self._version = version
+        self._version = next(
+            (
+                version
+                for name, version in VERSION_PROPERTIES.items()
+                if name in self._raw_properties
+            ),
+            0,
+        )
 
     async def _check_revision(self) -> None:
-        revision_json = json.loads(
+        revision_json = self._api.json_loads(
             self._raw_properties["oem_sock_version"]["value"],
         )
         self._revision = revision_json["rev"]
 
     async def update_properties(
         self,
+        deadline: Optional[float] = None,
+        full: bool = False,
     ) -> PropertiesDict:
-        """Calls the Owlet api to update the properties and then returns the raw response dict, the formatted dict from
-        normalise_properties and any new api tokens if they have changed.
+        """Calls the Owlet api to update the properties and then returns the raw response dict, the formatted dict decoded from it,
+        the keys of the formatted dict that changed and any new api tokens if they have changed.
+
+        Only the raw properties that the decoder reads for this sock version are fetched, pass full to fetch every property.
+        Only the raw properties whose data_updated_at has moved on since the last update are decoded again.
+
+        Parameters
+        ----------
+        deadline (float), optional:time.monotonic() value by which the update must finish, once passed OwletTimeoutError is raised
+        full (bool), optional:Fetch every property of the device into raw_properties rather than only the ones that are normalised
 
         Returns
         -------
         (dict):Dictionary containing three dictionaries, one with the raw json response from the API and another with the stripped down
-        properties from normalise_properties, the third will contain the new api tokens if they have changed, if they haven't changed this will be None
+        properties decoded from them, the third will contain the new api tokens if they have changed, if they haven't changed this will be None.
+        'changed' holds the set of keys in properties added, removed or given a new value by this update
 
         """
-        properties = await self._api.get_properties(self.serial)
+        properties = await self._api.get_properties(
+            self.serial,
+            deadline=deadline,
+            names=(
+                None
+                if full
+                else PROPERTY_NAMES.get(self._version or 0, PROPERTY_NAMES_ANY)
+            ),
+        )
+        previous = self._raw_properties
         self._raw_properties = properties["response"]
         if self._version is None:
             await self._check_version()
         if self._revision is None and self._version == 3:
             await self._check_revision()
-        self._properties = await self._normalise_properties()
+        changed = await self._renormalise(previous)
 
         response: PropertiesDict = {
             "raw_properties": self._raw_properties,
             "properties": self._properties,
+            "changed": changed,
         }
 
         if "tokens" in properties:
@@ -275,9 +332,124 @@ class Sock:
 
         return response
 
-    async def control_base_station(self, on: bool) -> bool:
+    async def update_vitals(
+        self,
+        deadline: Optional[float] = None,
+    ) -> PropertiesDict:
+        """Calls the Owlet api for only the vitals of the sock, the REAL_TIME_VITALS property of a v3 sock or the vitals properties of
+        a v2 sock, and updates the vitals derived values in properties leaving the others as they were. If the sock version is not
+        known yet update_properties is called instead.
+
+        Parameters
+        ----------
+        deadline (float), optional:time.monotonic() value by which the update must finish, once passed OwletTimeoutError is raised
+
+        Returns
+        -------
+        (dict):Dictionary in the same form as update_properties returns
+
+        """
+        tokens: Optional[TokenDict] = None
+        previous = self._raw_properties
+        if self._version == 3:
+            vitals = await self._api.get_property(
+                self.serial,
+                "REAL_TIME_VITALS",
+                deadline=deadline,
+            )
+            self._raw_properties = {
+                **self._raw_properties,
+                "REAL_TIME_VITALS": vitals["response"],
+            }
+            tokens = vitals.get("tokens")
+        elif self._version == 2:
+            vitals_properties = await self._api.get_properties(
+                self.serial,
+                deadline=deadline,
+                names=[name for table in VITALS_2.values() for name in table.values()],
+            )
+            self._raw_properties = {
+                **self._raw_properties,
+                **vitals_properties["response"],
+            }
+            tokens = vitals_properties.get("tokens")
+        else:
+            return await self.update_properties(deadline)
+
+        changed = await self._renormalise(previous)
+
+        response: PropertiesDict = {
+            "raw_properties": self._raw_properties,
+            "properties": self._properties,
+            "changed": changed,
+        }
+
+        if tokens:
+            response["tokens"] = tokens
+
+        return response
+
+    async def stream(
+        self,
+        min_interval: float = 5,
+        max_interval: float = 60,
+    ) -> AsyncIterator[PropertiesDict]:
+        """Yields the result of update_properties over and over, waiting between updates for an interval that tracks the sock's activity.
+
+        The interval drops to min_interval whenever the vitals change or an alert is raised, doubles after each update where nothing
+        of note changed, and goes straight to max_interval while the sock is off, charging or its base station is off. Stop by
+        breaking out of the loop or cancelling the task consuming it, nothing is left running.
+
+        Parameters
+        ----------
+        min_interval (float), optional:Shortest wait in seconds between updates
+        max_interval (float), optional:Longest wait in seconds between updates
+
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError(
+                "min_interval must be positive and no more than max_interval"
+            )
+        interval = min_interval
+        while True:
+            response = await self.update_properties()
+            yield response
+            interval = self._next_interval(
+                response, interval, min_interval, max_interval
+            )
+            await asyncio.sleep(interval)
+
+    def _next_interval(
+        self,
+        response: PropertiesDict,
+        interval: float,
+        min_interval: float,
+        max_interval: float,
+    ) -> float:
+        properties = response["properties"]
+        if (
+            properties.get("sock_off")
+            or properties.get("charging")
+            or properties.get("base_station_on") in (0, False)
+        ):
+            return max_interval
+        vitals = {key for key, _, _ in decoder_for(self._version or 0).vitals}
+        if not vitals.isdisjoint(response["changed"]) or any(
+            properties.get(key) for key in ALERT_KEYS
+        ):
+            return min_interval
+        return min(max_interval, interval * 2)
+
+    async def control_base_station(
+        self, on: bool, deadline: Optional[float] = None
+    ) -> bool:
         """Calls the Owlet api to turn the base station on or off, returns a bool if this was successful.
 
+        Parameters
+        ----------
+        on (bool):True to turn the base station on, False to turn it off
+        deadline (float), optional:time.monotonic() value by which the command must finish, once passed OwletTimeoutError is raised
+
         Returns
         -------
         (bool):Was the command successful
@@ -292,6 +464,7 @@ class Sock:
             self.serial,
             "BASE_STATION_ON_CMD",
             data,
+            deadline=deadline,
         )
 
         return True if response else False
@@ -0,0 +1,160 @@
+import asyncio
+import inspect
+import logging
+from collections import deque
+from logging import Logger
+from typing import Any, AsyncIterator, Callable, Iterable, Literal, Optional, TypedDict
+
+from .const import PropertyKey
+
+logger: Logger = logging.getLogger(__package__)
+
+OverflowPolicy = Literal["drop_oldest", "coalesce"]
+
+
+class PropertyChange(TypedDict):
+    old: Any
+    new: Any
+
+
+class ChangeEvent(TypedDict):
+    serial: str
+    changes: dict[PropertyKey, PropertyChange]
+
+
+class Subscription:
+    """Changes to the properties of one sock, delivered to a callback or held in a bounded queue.
+
+    With a callback each event is passed to it as soon as the update that produced it finishes, a coroutine callback is awaited.
+    Without one events are queued until read with get or async iteration. Once maxsize events are waiting the overflow policy
+    applies: drop_oldest discards the oldest event, coalesce folds the new event into the newest waiting one so each key keeps its
+    first old value and its latest new value, and keys that end up back where they started are dropped.
+
+    Attributes
+    ----------
+    serial : str
+        The serial number of the sock
+    keys : frozenset
+        The property keys delivered, None for every key
+    maxsize : int
+        Most events held while waiting to be read
+    overflow : str
+        What happens when an event arrives with maxsize already waiting, drop_oldest or coalesce
+    dropped : int
+        Events discarded or folded into another because the queue was full
+
+    """
+
+    def __init__(
+        self,
+        serial: str,
+        callback: Optional[Callable[[ChangeEvent], Any]] = None,
+        keys: Optional[Iterable[PropertyKey]] = None,
+        maxsize: int = 100,
+        overflow: OverflowPolicy = "drop_oldest",
+        on_close: Optional[Callable[["Subscription"], None]] = None,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if overflow not in ("drop_oldest", "coalesce"):
+            raise ValueError("overflow must be drop_oldest or coalesce")
+        self.serial = serial
+        self.keys = frozenset(keys) if keys is not None else None
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self._callback = callback
+        self._on_close = on_close
+        self._events: deque[ChangeEvent] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def qsize(self) -> int:
+        """Returns the number of events waiting to be read."""
+        return len(self._events)
+
+    async def publish(self, changes: dict[PropertyKey, PropertyChange]) -> None:
+        """Delivers the changes this subscription is interested in, does nothing if there are none or it is closed."""
+        if self._closed:
+            return
+        # Each subscription gets its own copy, coalescing edits queued events in place
+        changes = {
+            key: change
+            for key, change in changes.items()
+            if self.keys is None or key in self.keys
+        }
+        if not changes:
+            return
+        event: ChangeEvent = {"serial": self.serial, "changes": changes}
+
+        if self._callback is not None:
+            try:
+                result = self._callback(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Change callback for %s failed", self.serial)
+            return
+
+        if len(self._events) >= self.maxsize:
+            self.dropped += 1
+            if self.overflow == "coalesce":
+                self._coalesce(self._events[-1], changes)
+                if not self._events[-1]["changes"]:
+                    self._events.pop()
+                    if not self._events:
+                        self._ready.clear()
+                return
+            self._events.popleft()
+        self._events.append(event)
+        self._ready.set()
+
+    @staticmethod
+    def _coalesce(
+        event: ChangeEvent, changes: dict[PropertyKey, PropertyChange]
+    ) -> None:
+        merged = event["changes"]
+        for key, change in changes.items():
+            if key in merged:
+                change = {"old": merged[key]["old"], "new": change["new"]}
+            if change["old"] == change["new"]:
+                merged.pop(key, None)
+            else:
+                merged[key] = change
+
+    def get_nowait(self) -> Optional[ChangeEvent]:
+        """Returns the oldest waiting event, None if there is none."""
+        if not self._events:
+            return None
+        event = self._events.popleft()
+        if not self._events:
+            self._ready.clear()
+        return event
+
+    async def get(self) -> Optional[ChangeEvent]:
+        """Waits for and returns the oldest event, None once the subscription is closed and every event has been read."""
+        while not self._events:
+            if self._closed:
+                return None
+            await self._ready.wait()
+        return self.get_nowait()
+
+    def close(self) -> None:
+        """Stops delivery, events already queued can still be read."""
+        if self._closed:
+            return
+        self._closed = True
+        self._ready.set()
+        if self._on_close is not None:
+            self._on_close(self)
+
+    def __aiter__(self) -> AsyncIterator[ChangeEvent]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[ChangeEvent]:
+        while (event := await self.get()) is not None:
+            yield event
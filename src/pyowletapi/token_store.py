@@ -0,0 +1,159 @@
+import abc
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import tempfile
+from logging import Logger
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from .api import TokenDict
+
+logger: Logger = logging.getLogger(__package__)
+
+
+class TokenStore(abc.ABC):
+    """Base class for somewhere an OwletAPI object can load its tokens from and save them back to.
+
+    Methods
+    -------
+    load:
+        Returns the stored TokenDict, or None if nothing has been stored yet
+    save(tokens: TokenDict):
+        Stores the given TokenDict, replacing anything stored before
+    locked:
+        Async context manager held while an api object refreshes its tokens, so only one holder of the store refreshes at a time
+
+    """
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+
+    @contextlib.asynccontextmanager
+    async def locked(self) -> AsyncIterator[None]:
+        async with self._lock:
+            yield
+
+    @abc.abstractmethod
+    async def load(self) -> Optional["TokenDict"]:
+        """Returns the stored TokenDict, or None if nothing has been stored yet."""
+
+    @abc.abstractmethod
+    async def save(self, tokens: "TokenDict") -> None:
+        """Stores the given TokenDict, replacing anything stored before."""
+
+
+class MemoryTokenStore(TokenStore):
+    """Keeps tokens in memory, useful to share tokens between api objects in one process."""
+
+    def __init__(self, tokens: Optional["TokenDict"] = None) -> None:
+        super().__init__()
+        self._tokens = tokens
+
+    async def load(self) -> Optional["TokenDict"]:
+        return dict(self._tokens) if self._tokens else None  # type: ignore[return-value]
+
+    async def save(self, tokens: "TokenDict") -> None:
+        self._tokens = dict(tokens)  # type: ignore[assignment]
+
+
+class FileTokenStore(TokenStore):
+    """Keeps tokens in a json file so they survive a restart, and so api objects in several processes can share them.
+
+    Writes go to a temporary file which then replaces the token file, so a reader never sees a partial write. Writers hold an
+    exclusive lock on a sidecar .lock file while writing. The same lock is held by locked, so when several worker processes
+    point at one file only one of them refreshes and the others pick up its tokens.
+
+    Attributes
+    ----------
+    path : str
+        Path of the json file holding the tokens
+
+    """
+
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        poll_interval: float = 0.05,
+    ) -> None:
+        """Constructs a file backed token store.
+
+        Parameters
+        ----------
+        path (str):Path of the json file holding the tokens, the directory must exist
+        poll_interval (float):Seconds between attempts to take the file lock while another process holds it
+
+        """
+        super().__init__()
+        self.path = os.fspath(path)
+        self._lock_path = self.path + ".lock"
+        self._poll_interval = poll_interval
+        self._owner: Optional["asyncio.Task[object]"] = None
+
+    @contextlib.asynccontextmanager
+    async def locked(self) -> AsyncIterator[None]:
+        async with self._lock:
+            with open(self._lock_path, "a") as lock_file:
+                if fcntl:
+                    # Poll rather than block a thread so a cancelled waiter never ends up holding the lock
+                    while True:
+                        try:
+                            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                            break
+                        except BlockingIOError:
+                            await asyncio.sleep(self._poll_interval)
+                self._owner = asyncio.current_task()
+                try:
+                    yield
+                finally:
+                    self._owner = None
+
+    async def load(self) -> Optional["TokenDict"]:
+        return await asyncio.to_thread(self._read)
+
+    async def save(self, tokens: "TokenDict") -> None:
+        if self._owner is not None and self._owner is asyncio.current_task():
+            # Already holding both locks inside locked
+            await asyncio.to_thread(self._replace, tokens)
+            return
+        async with self._lock:
+            await asyncio.to_thread(self._write, tokens)
+
+    def _read(self) -> Optional["TokenDict"]:
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                tokens: "TokenDict" = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as err:
+            logger.warning("Could not read token file %s: %s", self.path, err)
+            return None
+        return tokens
+
+    def _write(self, tokens: "TokenDict") -> None:
+        with open(self._lock_path, "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._replace(tokens)
+
+    def _replace(self, tokens: "TokenDict") -> None:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.path) or ".",
+            prefix=".tokens-",
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(tokens, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
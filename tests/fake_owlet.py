@@ -0,0 +1,252 @@
+import asyncio
+import json
+import unittest
+import warnings
+from collections import Counter
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp import web
+
+from src.pyowletapi.api import OwletAPI
+
+VITALS = {"ox": 97, "hr": 120, "bat": 80, "bso": 1, "chg": 0, "st": 35}
+
+
+class FakeOwlet:
+    """A local aiohttp server standing in for the Google, Owlet and Ayla endpoints.
+
+    The session returned by session sends every request here, whatever host it was made for. calls counts the requests to each
+    path, dead_hosts holds hosts whose connections are refused, fail holds how many times to answer a request whose path contains the key with fail_status and a retry_after Retry-After header if set, malformed how many times to
+    answer it with an empty json object, empty how many times to answer it with an empty body, and delay holds seconds to wait before answering a request whose path contains the key.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self.dead_hosts: set[str] = set()
+        self.fail: Counter[str] = Counter()
+        self.fail_status = 503
+        self.retry_after: Optional[str] = None
+        self.malformed: Counter[str] = Counter()
+        self.empty: Counter[str] = Counter()
+        self.delay: dict[str, float] = {}
+        self.versions: dict[str, int] = {"DSN1": 3}
+        self.reported: dict[str, Any] = {}
+        self._reports: Counter[str] = Counter()
+        self.datapoints = 250
+        self.ayla_refresh_status = 200
+        self.sign_in_refresh: Optional[str] = "arefresh"
+        self.token = "tok1"
+        self._issued = 1
+        self._runner: Optional[web.AppRunner] = None
+        self.port = 0
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def session(self, **kwargs: Any) -> aiohttp.ClientSession:
+        """Returns a session sending every request to this server, kwargs are passed to aiohttp.ClientSession."""
+        port = self.port
+        dead_hosts = self.dead_hosts
+        # aiohttp discourages subclassing ClientSession, but it is the one place every request passes through
+        warnings.filterwarnings("ignore", "Inheritance class", DeprecationWarning)
+
+        class RoutedSession(aiohttp.ClientSession):
+            def _request(self, method: str, str_or_url: Any, **kwargs: Any) -> Any:
+                url = urlsplit(str(str_or_url))
+                query = f"?{url.query}" if url.query else ""
+                # Nothing listens on port 1, so connections to a dead host are refused
+                target = 1 if url.netloc in dead_hosts else port
+                return super()._request(
+                    method,
+                    f"http://127.0.0.1:{target}/{url.netloc}{url.path}{query}",
+                    **kwargs,
+                )
+
+        return RoutedSession(**kwargs)
+
+    def api(self, **kwargs: Any) -> OwletAPI:
+        """Returns an OwletAPI signed in with the current auth token, talking to this server."""
+        kwargs.setdefault("token", self.token)
+        kwargs.setdefault("expiry", 2**40)
+        kwargs.setdefault("refresh", "grefresh")
+        if "session" not in kwargs:
+            kwargs["session"] = self.session()
+        return OwletAPI("world", "user@example.com", "password", **kwargs)
+
+    def count(self, fragment: str) -> int:
+        """Returns the number of requests made to paths containing fragment."""
+        return sum(calls for path, calls in self.calls.items() if fragment in path)
+
+    def report(self, name: str, value: Any) -> None:
+        """Sets a property of every device to value with a new data_updated_at, as a sock does when it reports."""
+        self.reported[name] = value
+        self._reports[name] += 1
+
+    def expire_token(self) -> None:
+        """Rejects the auth token in use, as if it had been revoked, until the client signs in again."""
+        self._issue()
+
+    def _issue(self) -> str:
+        self._issued += 1
+        self.token = f"tok{self._issued}"
+        return self.token
+
+    def _properties(self, dsn: str) -> list[dict[str, Any]]:
+        values: dict[str, Any] = {"HIGH_OX_ALRT": 0, "LOW_BATT_ALRT": 0, "SOCK_OFF": 0}
+        if self.versions.get(dsn) == 3:
+            values["REAL_TIME_VITALS"] = json.dumps(VITALS)
+            values["oem_sock_version"] = json.dumps({"rev": 5})
+        elif self.versions.get(dsn) == 2:
+            values.update(
+                {
+                    "CHARGE_STATUS": 0,
+                    "OXYGEN_LEVEL": 98,
+                    "HEART_RATE": 110,
+                    "BASE_STATION_ON": 1,
+                    "oem_sock_version": "2",
+                }
+            )
+        values.update(
+            {name: value for name, value in self.reported.items() if name in values}
+        )
+        return [
+            {
+                "property": {
+                    "name": name,
+                    "value": value,
+                    "data_updated_at": f"2024-01-01T00:{self._reports[name]:02d}:00Z",
+                }
+            }
+            for name, value in values.items()
+        ]
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        path = request.path
+        self.calls[path] += 1
+        for key, seconds in self.delay.items():
+            if key in path:
+                await asyncio.sleep(seconds)
+        for key in list(self.fail):
+            if key in path and self.fail[key] > 0:
+                self.fail[key] -= 1
+                headers = (
+                    {}
+                    if self.retry_after is None
+                    else {"Retry-After": self.retry_after}
+                )
+                return web.json_response({}, status=self.fail_status, headers=headers)
+        for key in list(self.malformed):
+            if key in path and self.malformed[key] > 0:
+                self.malformed[key] -= 1
+                return web.json_response({})
+        for key in list(self.empty):
+            if key in path and self.empty[key] > 0:
+                self.empty[key] -= 1
+                return web.Response()
+
+        if "verifyPassword" in path:
+            return web.json_response({"refreshToken": "grefresh"})
+        if "securetoken" in path:
+            return web.json_response({"refresh_token": "grefresh", "id_token": "idtok"})
+        if "/mini/" in path:
+            return web.json_response({"mini_token": "mini"})
+        if "token_sign_in" in path:
+            signed_in: dict[str, Any] = {
+                "access_token": self._issue(),
+                "expires_in": 86400,
+            }
+            if self.sign_in_refresh is not None:
+                signed_in["refresh_token"] = self.sign_in_refresh
+            return web.json_response(signed_in)
+        if "refresh_token.json" in path:
+            if self.ayla_refresh_status != 200:
+                return web.json_response({}, status=self.ayla_refresh_status)
+            return web.json_response(
+                {
+                    "access_token": self._issue(),
+                    "refresh_token": "arefresh",
+                    "expires_in": 86400,
+                }
+            )
+
+        if request.headers.get("Authorization") != f"auth_token {self.token}":
+            return web.json_response({}, status=401)
+        if path.endswith("/devices.json"):
+            return web.json_response(
+                [
+                    {"device": {"dsn": dsn, "product_name": "Sock"}}
+                    for dsn in self.versions
+                ]
+            )
+        parts = path.split("/")
+        dsn = parts[parts.index("dsns") + 1]
+        if path.endswith("/properties.json"):
+            names = request.query.getall("names[]", [])
+            return web.json_response(
+                [
+                    p
+                    for p in self._properties(dsn)
+                    if not names or p["property"]["name"] in names
+                ]
+            )
+        if path.endswith("/datapoints.json") and request.method == "POST":
+            return web.json_response({"datapoint": {"value": 1}}, status=201)
+        if path.endswith("/datapoints.json"):
+            page = int(request.query.get("page", 1))
+            per_page = int(request.query.get("per_page", 100))
+            start = (page - 1) * per_page
+            end = min(self.datapoints, start + per_page)
+            return web.json_response(
+                {
+                    "datapoints": [
+                        {
+                            "datapoint": {
+                                "value": str(i),
+                                "created_at": "2024-01-01T00:00:00Z",
+                            }
+                        }
+                        for i in range(start, end)
+                    ],
+                    "meta": {
+                        "next_page": (
+                            f"?page={page + 1}" if end < self.datapoints else None
+                        )
+                    },
+                }
+            )
+        name = parts[-1][: -len(".json")]
+        for p in self._properties(dsn):
+            if p["property"]["name"] == name:
+                return web.json_response(p)
+        return web.json_response({}, status=404)
+
+
+class FakeOwletTestCase(unittest.IsolatedAsyncioTestCase):
+    """Starts a FakeOwlet for each test, self.api talks to it."""
+
+    async def asyncSetUp(self) -> None:
+        self.server = FakeOwlet()
+        await self.server.start()
+        self.api: OwletAPI = self.server.api()
+
+    async def asyncTearDown(self) -> None:
+        await self.api.close()
+        await self.server.close()
+
+    async def requests_reach_server(self, fragment: str, calls: int = 1) -> None:
+        """Waits until the server has seen calls requests to fragment."""
+        async with asyncio.timeout(2):
+            while self.server.count(fragment) < calls:
+                await asyncio.sleep(0.001)
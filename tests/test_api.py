@@ -0,0 +1,552 @@
+import asyncio
+import time
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from src.pyowletapi.api import OwletAPI, TokenDict
+from src.pyowletapi.cache import ResponseCache
+from src.pyowletapi.const import REGION_INFO
+from src.pyowletapi.exceptions import (
+    OwletConnectionError,
+    OwletTimeoutError,
+)
+from src.pyowletapi.ratelimit import RateLimiter
+from src.pyowletapi.retry import RetryPolicy
+
+from .fake_owlet import FakeOwletTestCase
+
+
+class WarmupTests(FakeOwletTestCase):
+    hosts = {
+        urlsplit(url).netloc
+        for key, url in REGION_INFO["world"].items()
+        if key.startswith("url_")
+    }
+
+    async def test_connections_opened_to_every_host(self) -> None:
+        self.assertEqual(await self.api.warmup(), len(self.hosts))
+        for host in self.hosts:
+            self.assertEqual(self.server.count(f"/{host}/"), 1)
+
+    async def test_dead_host_not_counted(self) -> None:
+        self.server.dead_hosts.add("www.googleapis.com")
+        self.assertEqual(await self.api.warmup(timeout=1), len(self.hosts) - 1)
+        self.assertFalse(
+            await self.api._warm_origin("https://www.googleapis.com", timeout=1)
+        )
+        self.assertEqual(self.server.count("www.googleapis.com"), 0)
+
+
+class RateLimitTests(FakeOwletTestCase):
+    def token_api(self, limiter: RateLimiter, account: str) -> OwletAPI:
+        api = OwletAPI(
+            "world",
+            token=self.server.token,
+            expiry=2**40,
+            session=self.server.session(),
+            validate_requests=False,
+            rate_limiter=limiter,
+            account=account,
+        )
+        self.addAsyncCleanup(api.close)
+        return api
+
+    async def test_token_only_accounts_have_separate_buckets(self) -> None:
+        limiter = RateLimiter(host_rate=None, account_rate=0.1, account_burst=1)
+        first = self.token_api(limiter, "first")
+        second = self.token_api(limiter, "second")
+        async with asyncio.timeout(1):
+            await first.get_property("DSN1", "REAL_TIME_VITALS", activate=False)
+            await second.get_property("DSN1", "REAL_TIME_VITALS", activate=False)
+        self.assertNotIn("rate_limited_requests", second.metrics)
+
+        # A second request for the same account has to wait for its bucket to refill
+        with self.assertRaises(OwletTimeoutError):
+            await first.get_property(
+                "DSN1",
+                "HIGH_OX_ALRT",
+                deadline=time.monotonic() + 0.05,
+                activate=False,
+            )
+
+
+class BreakerTests(FakeOwletTestCase):
+    async def test_probe_released_when_rate_limiter_times_out(self) -> None:
+        limiter = RateLimiter(host_rate=0.1, host_burst=1)
+        api = self.server.api(
+            breaker={"failure_threshold": 1, "reset_timeout": 0.01},
+            rate_limiter=limiter,
+            validate_requests=False,
+        )
+        self.addAsyncCleanup(api.close)
+        breaker = api._breakers["properties"]
+        breaker.record_failure()
+        await asyncio.sleep(0.02)
+        # Empty the bucket so the next request has to wait past its deadline
+        await limiter.acquire(urlsplit(api._api_url).netloc, "user@example.com")
+
+        with self.assertRaises(OwletTimeoutError):
+            await api.get_property(
+                "DSN1",
+                "REAL_TIME_VITALS",
+                deadline=time.monotonic() + 0.05,
+                activate=False,
+            )
+        # The abandoned request finishes cancelling in the background
+        await asyncio.sleep(0.01)
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.allow())
+
+
+class RefreshTests(FakeOwletTestCase):
+    def refreshing_api(self, **kwargs: Any) -> OwletAPI:
+        # Sign in returns no Ayla refresh token, so whether the old one was kept shows
+        self.server.sign_in_refresh = None
+        return self.server.api(
+            expiry=0, ayla_refresh="arefresh", validate_requests=False, **kwargs
+        )
+
+    async def test_ayla_refresh(self) -> None:
+        api = self.refreshing_api()
+        self.addAsyncCleanup(api.close)
+        tokens = await api.refresh_authentication()
+        assert tokens is not None
+        self.assertEqual(tokens["api_token"], self.server.token)
+        self.assertEqual(self.server.count("securetoken"), 0)
+
+    async def test_rejected_ayla_refresh_token_is_dropped(self) -> None:
+        for status in (400, 401):
+            self.server.ayla_refresh_status = status
+            api = self.refreshing_api()
+            self.addAsyncCleanup(api.close)
+            tokens = await api.refresh_authentication()
+            assert tokens is not None
+            self.assertEqual(tokens["api_token"], self.server.token)
+            self.assertIsNone(api._ayla_refresh)
+
+    async def test_ayla_refresh_server_error_falls_back(self) -> None:
+        self.server.ayla_refresh_status = 503
+        api = self.refreshing_api()
+        self.addAsyncCleanup(api.close)
+        tokens = await api.refresh_authentication()
+        assert tokens is not None
+        self.assertEqual(tokens["api_token"], self.server.token)
+        self.assertEqual(api._ayla_refresh, "arefresh")
+        self.assertEqual(self.server.count("securetoken"), 1)
+
+    async def test_ayla_refresh_timeout_falls_back(self) -> None:
+        self.server.delay["refresh_token.json"] = 0.3
+        api = self.refreshing_api(timeout=aiohttp.ClientTimeout(total=0.1))
+        self.addAsyncCleanup(api.close)
+        tokens = await api.refresh_authentication()
+        assert tokens is not None
+        self.assertEqual(tokens["api_token"], self.server.token)
+        self.assertEqual(api._ayla_refresh, "arefresh")
+
+
+class RetryTests(FakeOwletTestCase):
+    async def retrying_api(self, **kwargs: Any) -> OwletAPI:
+        await self.api.close()
+        kwargs.setdefault("base_delay", 0.001)
+        kwargs.setdefault("max_delay", 1)
+        self.api = self.server.api(validate_requests=False, retry=RetryPolicy(**kwargs))
+        return self.api
+
+    async def poll(self) -> None:
+        await self.api.get_property("DSN1", "REAL_TIME_VITALS", activate=False)
+
+    async def test_failed_get_retried(self) -> None:
+        await self.retrying_api()
+        self.server.fail["/REAL_TIME_VITALS.json"] = 2
+        await self.poll()
+        self.assertEqual(self.server.count("/REAL_TIME_VITALS.json"), 3)
+        self.assertEqual(self.api.metrics["request_retries"], 2)
+
+    async def test_post_not_retried(self) -> None:
+        await self.retrying_api()
+        self.server.fail["/datapoints.json"] = 1
+        with self.assertRaises(OwletConnectionError):
+            await self.api.post_command(
+                "DSN1",
+                "BASE_STATION_ON_CMD",
+                {"datapoint": {"value": 1}},
+                activate=False,
+            )
+        self.assertEqual(self.server.count("/datapoints.json"), 1)
+        self.assertNotIn("request_retries", self.api.metrics)
+
+    async def test_retry_after_honoured(self) -> None:
+        await self.retrying_api()
+        self.server.fail["/REAL_TIME_VITALS.json"] = 1
+        self.server.retry_after = "0.2"
+        started = time.monotonic()
+        await self.poll()
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(self.api.metrics["retry_delay_seconds"], 0.2)
+
+    async def test_budget_exhausted(self) -> None:
+        await self.retrying_api(budget_max=1, budget_ratio=0)
+        self.server.fail["/REAL_TIME_VITALS.json"] = 2
+        with self.assertRaises(OwletConnectionError):
+            await self.poll()
+        self.assertEqual(self.server.count("/REAL_TIME_VITALS.json"), 2)
+        self.assertEqual(self.api.metrics["request_retries"], 1)
+        self.assertEqual(self.api.metrics["retry_budget_exhausted"], 1)
+
+    async def test_retry_past_deadline_dropped(self) -> None:
+        await self.retrying_api()
+        self.server.fail["/REAL_TIME_VITALS.json"] = 1
+        self.server.retry_after = "0.5"
+        # Shared GETs run without the caller's deadline, so send directly to give the retry one
+        with self.assertRaises(OwletConnectionError):
+            await self.api._send(
+                "GET",
+                "/dsns/DSN1/properties/REAL_TIME_VITALS.json",
+                None,
+                time.monotonic() + 0.2,
+                None,
+            )
+        self.assertEqual(self.server.count("/REAL_TIME_VITALS.json"), 1)
+        self.assertNotIn("request_retries", self.api.metrics)
+
+
+class CoalescingTests(FakeOwletTestCase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        await self.api.close()
+        self.api = self.server.api(validate_requests=False)
+
+    async def test_shared_request_outlives_starter_deadline(self) -> None:
+        self.server.delay["/properties/"] = 0.2
+        short = asyncio.create_task(
+            self.api.get_property(
+                "DSN1",
+                "REAL_TIME_VITALS",
+                deadline=time.monotonic() + 0.05,
+                activate=False,
+            )
+        )
+        await asyncio.sleep(0)
+        response = await self.api.get_property(
+            "DSN1", "REAL_TIME_VITALS", activate=False
+        )
+
+        with self.assertRaises(OwletTimeoutError):
+            await short
+        self.assertEqual(response["response"]["name"], "REAL_TIME_VITALS")
+        self.assertEqual(
+            self.server.count("/properties/REAL_TIME_VITALS.json"),
+            1,
+        )
+        self.assertEqual(self.api.metrics["requests_coalesced"], 1)
+
+    async def test_shared_refresh_outlives_starter_deadline(self) -> None:
+        self.server.delay["token_sign_in"] = 0.2
+        api = self.server.api(expiry=0, validate_requests=False)
+        self.addAsyncCleanup(api.close)
+        short = asyncio.create_task(
+            api.refresh_authentication(deadline=time.monotonic() + 0.05)
+        )
+        await asyncio.sleep(0)
+        tokens = await api.refresh_authentication()
+
+        with self.assertRaises(OwletTimeoutError):
+            await short
+        assert tokens is not None
+        self.assertEqual(tokens["api_token"], self.server.token)
+        self.assertEqual(self.server.count("token_sign_in"), 1)
+
+    async def test_cancelled_caller_does_not_cancel_shared_request(self) -> None:
+        self.server.delay["/properties/"] = 0.1
+        calls = [
+            asyncio.create_task(
+                self.api.get_property("DSN1", "REAL_TIME_VITALS", activate=False)
+            )
+            for _ in range(3)
+        ]
+        await self.requests_reach_server("/properties/REAL_TIME_VITALS.json")
+        calls[0].cancel()
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        self.assertIsInstance(results[0], asyncio.CancelledError)
+        for result in results[1:]:
+            self.assertEqual(result["response"]["name"], "REAL_TIME_VITALS")  # type: ignore[index]
+        self.assertEqual(self.server.count("/properties/REAL_TIME_VITALS.json"), 1)
+        self.assertEqual(self.api.metrics["requests_coalesced"], 2)
+
+    async def test_shared_request_cancelled_with_last_caller(self) -> None:
+        self.server.delay["/properties/"] = 0.1
+        calls = [
+            asyncio.create_task(
+                self.api.get_property("DSN1", "REAL_TIME_VITALS", activate=False)
+            )
+            for _ in range(2)
+        ]
+        await self.requests_reach_server("/properties/REAL_TIME_VITALS.json")
+        self.assertEqual(len(self.api._in_flight), 1)
+        flight = next(iter(self.api._in_flight.values()))
+        for call in calls:
+            call.cancel()
+        await asyncio.gather(*calls, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        self.assertTrue(flight.task.cancelled())
+        self.assertEqual(self.api._in_flight, {})
+
+        # A later caller starts a fresh request
+        response = await self.api.get_property(
+            "DSN1", "REAL_TIME_VITALS", activate=False
+        )
+        self.assertEqual(response["response"]["name"], "REAL_TIME_VITALS")
+        self.assertEqual(self.server.count("/properties/REAL_TIME_VITALS.json"), 2)
+
+    async def test_caller_arriving_after_cancel_starts_new_request(self) -> None:
+        self.server.delay["/properties/"] = 0.1
+        first = asyncio.create_task(
+            self.api.get_property("DSN1", "REAL_TIME_VITALS", activate=False)
+        )
+        await self.requests_reach_server("/properties/REAL_TIME_VITALS.json")
+        first.cancel()
+        second = asyncio.create_task(
+            self.api.get_property("DSN1", "REAL_TIME_VITALS", activate=False)
+        )
+        results = await asyncio.gather(first, second, return_exceptions=True)
+
+        self.assertIsInstance(results[0], asyncio.CancelledError)
+        self.assertEqual(results[1]["response"]["name"], "REAL_TIME_VITALS")  # type: ignore[index]
+        self.assertEqual(self.server.count("/properties/REAL_TIME_VITALS.json"), 2)
+
+
+class RenewalTests(FakeOwletTestCase):
+    async def test_unexpected_error_does_not_stop_renewal(self) -> None:
+        self.server.malformed["token_sign_in"] = 1
+        api = self.server.api(expiry=0, validate_requests=False)
+        self.addAsyncCleanup(api.close)
+        renewed: list[TokenDict] = []
+        with self.assertLogs("src.pyowletapi", "ERROR"):
+            api.start_token_renewal(callback=renewed.append, retry_interval=0.01)
+            await asyncio.sleep(0.2)
+
+        self.assertEqual(len(renewed), 1)
+        self.assertEqual(renewed[0]["api_token"], self.server.token)
+        self.assertEqual(self.server.count("token_sign_in"), 2)
+
+
+class ActivationTests(FakeOwletTestCase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        await self.api.close()
+        self.api = self.server.api(validate_requests=False, activation_ttl=0.1)
+
+    async def poll(self, activate: Optional[bool] = None) -> None:
+        await self.api.get_property("DSN1", "REAL_TIME_VITALS", activate=activate)
+
+    async def test_activation_skipped_within_ttl(self) -> None:
+        await self.poll()
+        await self.poll()
+        self.assertEqual(self.server.count("/APP_ACTIVE/datapoints.json"), 1)
+        self.assertEqual(self.api.metrics["activations_skipped"], 1)
+
+        await asyncio.sleep(0.12)
+        await self.poll()
+        self.assertEqual(self.server.count("/APP_ACTIVE/datapoints.json"), 2)
+        self.assertEqual(self.api.metrics["activations_skipped"], 1)
+
+    async def test_activate_argument_overrides_ttl(self) -> None:
+        await self.poll(activate=False)
+        self.assertEqual(self.server.count("/APP_ACTIVE/datapoints.json"), 0)
+
+        await self.poll()
+        await self.poll(activate=True)
+        self.assertEqual(self.server.count("/APP_ACTIVE/datapoints.json"), 2)
+        self.assertNotIn("activations_skipped", self.api.metrics)
+
+    async def test_no_ttl_activates_every_time(self) -> None:
+        await self.api.close()
+        self.api = self.server.api(validate_requests=False)
+        await self.poll()
+        await self.poll()
+        self.assertEqual(self.server.count("/APP_ACTIVE/datapoints.json"), 2)
+
+
+class PoolTests(FakeOwletTestCase):
+    async def test_config_reaches_connector(self) -> None:
+        api = OwletAPI(
+            "world",
+            "user@example.com",
+            "password",
+            pool={"limit": 7, "limit_per_host": 3, "keepalive_timeout": 5},
+        )
+        try:
+            connector = api.session.connector
+            assert isinstance(connector, aiohttp.TCPConnector)
+            self.assertEqual(connector.limit, 7)
+            self.assertEqual(connector.limit_per_host, 3)
+            self.assertEqual(connector._keepalive_timeout, 5)
+            self.assertEqual(api.pool_stats["limit"], 7)
+            self.assertEqual(api.pool_stats["limit_per_host"], 3)
+        finally:
+            await api.close()
+
+    async def test_usage_while_request_held(self) -> None:
+        await self.api.close()
+        self.api = self.server.api(
+            validate_requests=False,
+            session=self.server.session(connector=aiohttp.TCPConnector(limit=1)),
+        )
+        self.server.delay["/properties/"] = 0.2
+        polls = [
+            asyncio.create_task(self.api.get_property("DSN1", name, activate=False))
+            for name in ("REAL_TIME_VITALS", "HIGH_OX_ALRT")
+        ]
+        await self.requests_reach_server("/properties/")
+        await asyncio.sleep(0.01)
+        stats = self.api.pool_stats
+        self.assertEqual((stats["in_use"], stats["idle"], stats["waiters"]), (1, 0, 1))
+
+        await asyncio.gather(*polls)
+        stats = self.api.pool_stats
+        self.assertEqual((stats["in_use"], stats["idle"], stats["waiters"]), (0, 1, 0))
+
+
+class CacheTests(FakeOwletTestCase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        await self.api.close()
+        self.server.versions = {"DSN1": 3, "DSN2": 3}
+        self.api = self.server.api(validate_requests=False, cache=ResponseCache())
+
+    async def poll(self, dsn: str = "DSN1", activate: Optional[bool] = False) -> None:
+        await self.api.get_property(dsn, "REAL_TIME_VITALS", activate=activate)
+
+    async def test_hit_skips_request(self) -> None:
+        await self.poll()
+        await self.poll()
+        self.assertEqual(self.server.count("/REAL_TIME_VITALS.json"), 1)
+        self.assertEqual(self.api.metrics["cache_hits"], 1)
+
+    async def test_command_invalidates_device(self) -> None:
+        await self.poll("DSN1")
+        await self.poll("DSN2")
+        await self.api.post_command(
+            "DSN1", "BASE_STATION_ON_CMD", {"datapoint": {"value": 1}}, activate=False
+        )
+        await self.poll("DSN1")
+        await self.poll("DSN2")
+        self.assertEqual(self.server.count("DSN1/properties/REAL_TIME_VITALS.json"), 2)
+        self.assertEqual(self.server.count("DSN2/properties/REAL_TIME_VITALS.json"), 1)
+
+    async def test_activation_does_not_invalidate(self) -> None:
+        await self.poll()
+        await self.api.activate("DSN1")
+        await self.poll()
+        self.assertEqual(self.server.count("/APP_ACTIVE/datapoints.json"), 1)
+        self.assertEqual(self.server.count("/REAL_TIME_VITALS.json"), 1)
+
+    async def test_activation_skipped_while_fresh(self) -> None:
+        await self.poll(activate=None)
+        await self.poll(activate=None)
+        self.assertEqual(self.server.count("/APP_ACTIVE/datapoints.json"), 1)
+        self.assertEqual(self.api.metrics["activations_skipped"], 1)
+
+
+class DatapointTests(FakeOwletTestCase):
+    async def test_pages_are_followed(self) -> None:
+        values = [
+            datapoint["value"]
+            async for datapoint in self.api.iter_datapoints(
+                "DSN1", "REAL_TIME_VITALS", per_page=100
+            )
+        ]
+
+        self.assertEqual(values, [str(i) for i in range(250)])
+        self.assertEqual(self.server.count("/datapoints.json"), 3)
+
+    async def test_empty_body_ends_iteration(self) -> None:
+        self.server.empty["/datapoints.json"] = 1
+        values = [
+            datapoint
+            async for datapoint in self.api.iter_datapoints("DSN1", "REAL_TIME_VITALS")
+        ]
+
+        self.assertEqual(values, [])
+        self.assertEqual(self.server.count("/datapoints.json"), 1)
+
+    async def test_next_page_prefetched(self) -> None:
+        datapoints = self.api.iter_datapoints("DSN1", "REAL_TIME_VITALS", per_page=100)
+        first = await datapoints.__anext__()
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(first["value"], "0")
+        self.assertEqual(self.server.count("/datapoints.json"), 2)
+        await datapoints.aclose()
+
+    async def test_close_cancels_prefetch(self) -> None:
+        self.server.delay["/datapoints.json"] = 0.1
+        datapoints = self.api.iter_datapoints("DSN1", "REAL_TIME_VITALS", per_page=100)
+        await datapoints.__anext__()
+        await datapoints.aclose()
+
+        self.assertEqual(self.api._in_flight, {})
+        self.assertEqual(
+            [
+                task
+                for task in asyncio.all_tasks()
+                if task.get_coro().__qualname__.startswith("OwletAPI.")  # type: ignore[union-attr]
+            ],
+            [],
+        )
+
+
+class AuthTests(FakeOwletTestCase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        await self.api.close()
+        self.api = self.server.api(validate_requests=False)
+
+    async def test_rejected_token_reauthenticates_and_retries(self) -> None:
+        self.server.expire_token()
+        response = await self.api.get_property(
+            "DSN1", "REAL_TIME_VITALS", activate=False
+        )
+
+        self.assertEqual(response["response"]["name"], "REAL_TIME_VITALS")
+        self.assertEqual(self.api.tokens["api_token"], self.server.token)
+        self.assertEqual(self.server.count("token_sign_in"), 1)
+        self.assertEqual(self.server.count("/properties/REAL_TIME_VITALS.json"), 2)
+
+    async def test_only_one_retry_after_reauthenticating(self) -> None:
+        self.server.fail["/properties/"] = 2
+        self.server.fail_status = 401
+        with self.assertRaises(OwletConnectionError):
+            await self.api.get_property("DSN1", "REAL_TIME_VITALS", activate=False)
+
+        self.assertEqual(self.server.count("token_sign_in"), 1)
+        self.assertEqual(self.server.count("/properties/REAL_TIME_VITALS.json"), 2)
+
+    async def test_concurrent_rejections_share_one_refresh(self) -> None:
+        self.server.delay["token_sign_in"] = 0.05
+        self.server.expire_token()
+        names = ["REAL_TIME_VITALS", "HIGH_OX_ALRT", "LOW_BATT_ALRT", "SOCK_OFF"]
+        responses = await asyncio.gather(
+            *(self.api.get_property("DSN1", name, activate=False) for name in names)
+        )
+
+        self.assertEqual([r["response"]["name"] for r in responses], names)
+        self.assertEqual(self.server.count("token_sign_in"), 1)
+        self.assertEqual(self.api.metrics["refresh_coalesced"], len(names) - 1)
+
+    async def test_expired_token_refreshed_once(self) -> None:
+        await self.api.close()
+        self.api = self.server.api(expiry=0, validate_requests=False)
+        self.server.delay["token_sign_in"] = 0.05
+        names = ["REAL_TIME_VITALS", "HIGH_OX_ALRT", "LOW_BATT_ALRT"]
+        await asyncio.gather(
+            *(self.api.get_property("DSN1", name, activate=False) for name in names)
+        )
+
+        self.assertEqual(self.server.count("securetoken"), 1)
+        self.assertEqual(self.server.count("token_sign_in"), 1)
+        self.assertEqual(self.api.metrics["refresh_coalesced"], len(names) - 1)
@@ -0,0 +1,44 @@
+import unittest
+import time
+
+from src.pyowletapi.cache import ResponseCache
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_hit_and_miss(self) -> None:
+        cache = ResponseCache()
+        self.assertIsNone(cache.get("/devices.json"))
+        cache.set("/devices.json", "devices", [1])
+        self.assertEqual(cache.get("/devices.json"), [1])
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_entries_expire(self) -> None:
+        cache = ResponseCache(ttls={"properties": 0.01})
+        cache.set("/dsns/A/properties.json", "properties", {})
+        self.assertTrue(cache.fresh("/dsns/A/properties.json"))
+        time.sleep(0.02)
+        self.assertFalse(cache.fresh("/dsns/A/properties.json"))
+
+    def test_uncached_endpoint(self) -> None:
+        cache = ResponseCache()
+        cache.set("/dsns/A/properties/X/datapoints.json", "datapoints", [])
+        self.assertEqual(cache.stats["entries"], 0)
+
+    def test_lru_eviction(self) -> None:
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", "devices", 1)
+        cache.set("b", "devices", 2)
+        cache.get("a")
+        cache.set("c", "devices", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_invalidate_device(self) -> None:
+        cache = ResponseCache()
+        cache.set("/dsns/A/properties.json", "properties", {})
+        cache.set("/dsns/B/properties.json", "properties", {})
+        cache.invalidate("A")
+        self.assertFalse(cache.fresh("/dsns/A/properties.json"))
+        self.assertTrue(cache.fresh("/dsns/B/properties.json"))
@@ -0,0 +1,22 @@
+import json
+import unittest
+
+from src.pyowletapi import codec
+
+
+class CodecTests(unittest.TestCase):
+    def test_decodes_str_and_bytes(self) -> None:
+        payload = {"ox": 97, "hr": 120, "hw": "obl"}
+        self.assertEqual(codec.json_loads(json.dumps(payload)), payload)
+        self.assertEqual(codec.json_loads(json.dumps(payload).encode()), payload)
+
+    def test_prefers_orjson(self) -> None:
+        try:
+            import orjson
+        except ImportError:
+            self.skipTest("orjson is not installed")
+        self.assertIs(codec.json_loads, orjson.loads)
+
+    def test_invalid_json_raises_value_error(self) -> None:
+        with self.assertRaises(ValueError):
+            codec.json_loads(b"<html>")
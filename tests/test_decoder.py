@@ -0,0 +1,158 @@
+import json
+import unittest
+from typing import Any
+
+from src.pyowletapi.codec import json_loads
+from src.pyowletapi.decoder import decoder_for
+
+VITALS = {
+    "ox": 97,
+    "hr": 120,
+    "bat": 80,
+    "btt": 300,
+    "rsi": 30,
+    "oxta": 96,
+    "bso": 1,
+    "sc": 2,
+    "st": 35,
+    "ss": 1,
+    "mv": 3,
+    "aps": 0,
+    "chg": 0,
+    "alrt": 0,
+    "ota": 0,
+    "srf": 0,
+    "sb": 0,
+    "mvb": 0,
+    "onm": 0,
+    "mst": 0,
+    "bsb": 0,
+    "hw": "obl",
+}
+
+
+class PropertyDecoderTests(unittest.TestCase):
+    """Expected values are the output of the per-call normalisation the decoder replaced."""
+
+    def test_version_3(self) -> None:
+        raw: dict[str, dict[str, Any]] = {
+            "HIGH_OX_ALRT": {"value": 0},
+            "SOCK_OFF": {"value": 1},
+            "REAL_TIME_VITALS": {
+                "value": json.dumps(VITALS),
+                "data_updated_at": "2024-01-02T03:04:05Z",
+            },
+        }
+        self.assertEqual(
+            decoder_for(3).decode(raw, json_loads),
+            {
+                "high_oxygen_alert": False,
+                "sock_off": True,
+                "oxygen_saturation": 97.0,
+                "heart_rate": 120.0,
+                "battery_percentage": 80.0,
+                "battery_minutes": 300.0,
+                "signal_strength": 30.0,
+                "oxygen_10_av": 96.0,
+                "base_station_on": 1,
+                "sock_connection": 2,
+                "skin_temperature": 35,
+                "sleep_state": 1,
+                "movement": 3,
+                "alert_paused_status": 0,
+                "charging": 0,
+                "alerts_mask": 0,
+                "update_status": 0,
+                "readings_flag": 0,
+                "brick_status": 0,
+                "movement_bucket": 0,
+                "wellness_alert": 0,
+                "monitoring_start_time": 0,
+                "base_battery_status": 0,
+                "hardware_version": "obl",
+                "last_updated": "2024/01/02 03:04:05",
+            },
+        )
+
+    def test_version_3_partial_vitals(self) -> None:
+        raw: dict[str, dict[str, Any]] = {
+            "LOW_BATT_ALRT": {"value": 1},
+            "REAL_TIME_VITALS": {
+                "value": json.dumps({"hr": 88, "bso": 0, "hw": "obl"})
+            },
+        }
+        self.assertEqual(
+            decoder_for(3).decode(raw, json_loads),
+            {
+                "low_battery_alert": True,
+                "heart_rate": 88.0,
+                "base_station_on": 0,
+                "hardware_version": "obl",
+            },
+        )
+
+    def test_version_2(self) -> None:
+        raw: dict[str, dict[str, Any]] = {
+            "CRIT_OX_ALRT": {"value": 1},
+            "BLE_RSSI": {"value": 20},
+            "BASE_STATION_ON": {"value": 1},
+            "SOCK_CONNECTION": {"value": 0},
+            "OXYGEN_LEVEL": {"value": 98},
+            "HEART_RATE": {"value": 110},
+            "CHARGE_STATUS": {"value": 0},
+            "oem_sock_version": {"value": "v2"},
+        }
+        self.assertEqual(
+            decoder_for(2).decode(raw, json_loads),
+            {
+                "critical_oxygen_alert": True,
+                "signal_strength": 20.0,
+                "base_station_on": True,
+                "sock_connection": False,
+                "oxygen_saturation": 98,
+                "heart_rate": 110,
+                "charging": 0,
+                "hardware_version": "v2",
+            },
+        )
+
+    def test_unknown_version(self) -> None:
+        self.assertEqual(
+            decoder_for(0).decode({"SOCK_OFF": {"value": 0}}, json_loads),
+            {"sock_off": False},
+        )
+
+    def test_decoder_is_shared(self) -> None:
+        self.assertIs(decoder_for(3), decoder_for(3))
+
+    def test_decode_changed(self) -> None:
+        decoder = decoder_for(3)
+        raw: dict[str, dict[str, Any]] = {
+            "SOCK_OFF": {"value": 1},
+            "REAL_TIME_VITALS": {
+                "value": json.dumps(VITALS),
+                "data_updated_at": "2024-01-02T03:04:05Z",
+            },
+        }
+        previous = decoder.decode(raw, json_loads)
+        raw["REAL_TIME_VITALS"] = {
+            "value": json.dumps({**VITALS, "hr": 90}),
+            "data_updated_at": "2024-01-02T03:04:10Z",
+        }
+        properties, changed = decoder.decode_changed(
+            raw, previous, {"REAL_TIME_VITALS"}, json_loads
+        )
+        self.assertEqual(properties, decoder.decode(raw, json_loads))
+        self.assertEqual(list(properties), list(decoder.decode(raw, json_loads)))
+        self.assertEqual(changed, {"heart_rate", "last_updated"})
+
+    def test_decode_changed_removed_property(self) -> None:
+        decoder = decoder_for(2)
+        previous = decoder.decode(
+            {"SOCK_OFF": {"value": 1}, "HEART_RATE": {"value": 100}}, json_loads
+        )
+        properties, changed = decoder.decode_changed(
+            {"HEART_RATE": {"value": 100}}, previous, {"SOCK_OFF"}, json_loads
+        )
+        self.assertEqual(properties, {"heart_rate": 100})
+        self.assertEqual(changed, {"sock_off"})
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from collections import Counter
+from typing import Any, Optional
+
+from src.pyowletapi.fleet import OwletFleet
+
+
+class FakeSock:
+    running: Counter[str] = Counter()
+    peak: Counter[str] = Counter()
+
+    def __init__(self, account: str, serial: str, fail: bool = False) -> None:
+        self.account = account
+        self.serial = serial
+        self.fail = fail
+
+    async def update_properties(self, deadline: Optional[float] = None) -> Any:
+        self.running[self.account] += 1
+        self.running["total"] += 1
+        self.peak[self.account] = max(
+            self.peak[self.account], self.running[self.account]
+        )
+        self.peak["total"] = max(self.peak["total"], self.running["total"])
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail:
+                raise ValueError("bad payload")
+            return {"properties": {}, "raw_properties": {}, "changed": set()}
+        finally:
+            self.running[self.account] -= 1
+            self.running["total"] -= 1
+
+
+class OwletFleetTests(unittest.IsolatedAsyncioTestCase):
+    async def test_limits_and_fairness(self) -> None:
+        FakeSock.running.clear()
+        FakeSock.peak.clear()
+        fleet = OwletFleet(interval=0.05, concurrency=4, account_concurrency=2)
+        fleet.add_account("big", None)  # type: ignore[arg-type]
+        fleet.add_account("small", None)  # type: ignore[arg-type]
+        for i in range(50):
+            fleet.add_sock("big", FakeSock("big", f"B{i}"))  # type: ignore[arg-type]
+        fleet.add_sock("small", FakeSock("small", "S0"))  # type: ignore[arg-type]
+        fleet.start()
+        await asyncio.sleep(0.3)
+        await fleet.stop()
+
+        self.assertLessEqual(FakeSock.peak["total"], 4)
+        self.assertLessEqual(FakeSock.peak["big"], 2)
+        self.assertGreaterEqual(fleet.stats["S0"]["polls"], 3)
+        self.assertIsNotNone(fleet.lag("S0"))
+
+    async def test_failures_are_counted(self) -> None:
+        errors = []
+        fleet = OwletFleet(interval=0.02, on_error=lambda sock, err: errors.append(err))
+        fleet.add_account("a", None)  # type: ignore[arg-type]
+        fleet.add_sock("a", FakeSock("a", "F", fail=True))  # type: ignore[arg-type]
+        fleet.start()
+        await asyncio.sleep(0.1)
+        await fleet.stop()
+
+        self.assertGreaterEqual(fleet.stats["F"]["consecutive_failures"], 1)
+        self.assertIsNone(fleet.lag("F"))
+        self.assertTrue(errors)
+
+    async def test_sock_removed_before_poll_starts(self) -> None:
+        fleet = OwletFleet(interval=60, account_concurrency=1)
+        fleet.add_account("a", None)  # type: ignore[arg-type]
+        fleet.add_sock("a", FakeSock("a", "R"))  # type: ignore[arg-type]
+        fleet._ready["a"].append((0, "R"))
+        fleet._dispatch()
+        fleet.remove_sock("R")
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(fleet._running["a"], 0)
+        self.assertEqual(fleet.metrics["polls"], 1)
+        await fleet.stop()
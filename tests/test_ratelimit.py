@@ -0,0 +1,29 @@
+import unittest
+import asyncio
+import time
+
+from src.pyowletapi.ratelimit import RateLimiter, TokenBucket
+
+
+class TokenBucketTests(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_then_rate(self) -> None:
+        bucket = TokenBucket(rate=50, capacity=5)
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(10)))
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    async def test_invalid_rate(self) -> None:
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0, capacity=1)
+
+
+class RateLimiterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_hosts_limited_separately(self) -> None:
+        limiter = RateLimiter(host_rate=1, host_burst=1)
+        self.assertEqual(await limiter.acquire("a", "user"), 0)
+        self.assertEqual(await limiter.acquire("b", "user"), 0)
+
+    async def test_account_limit(self) -> None:
+        limiter = RateLimiter(host_rate=None, account_rate=20, account_burst=1)
+        await limiter.acquire("a", "user")
+        self.assertGreater(await limiter.acquire("b", "user"), 0)
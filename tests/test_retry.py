@@ -0,0 +1,39 @@
+import unittest
+
+from src.pyowletapi.retry import RetryPolicy, parse_retry_after
+
+
+class RetryPolicyTests(unittest.TestCase):
+    def test_only_idempotent_methods_retried(self) -> None:
+        policy = RetryPolicy()
+        self.assertTrue(policy.can_retry("GET", 1, 503))
+        self.assertTrue(policy.can_retry("GET", 1, None))
+        self.assertFalse(policy.can_retry("POST", 1, 503))
+        self.assertFalse(policy.can_retry("GET", 1, 404))
+        self.assertFalse(policy.can_retry("GET", 3, 503))
+
+    def test_retry_after_honoured(self) -> None:
+        policy = RetryPolicy(max_delay=10)
+        self.assertEqual(policy.next_delay(0, 429, "2"), 2)
+        self.assertIsNone(policy.next_delay(0, 503, "60"))
+
+    def test_decorrelated_jitter_bounds(self) -> None:
+        policy = RetryPolicy(base_delay=1, max_delay=5)
+        for _ in range(100):
+            delay = policy.next_delay(4)
+            assert delay is not None
+            self.assertGreaterEqual(delay, 1)
+            self.assertLessEqual(delay, 5)
+
+    def test_budget(self) -> None:
+        policy = RetryPolicy(budget_ratio=0.5, budget_max=1)
+        self.assertTrue(policy.take_retry())
+        self.assertFalse(policy.take_retry())
+        policy.record_request()
+        policy.record_request()
+        self.assertTrue(policy.take_retry())
+
+    def test_parse_retry_after(self) -> None:
+        self.assertEqual(parse_retry_after("3"), 3)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        self.assertIsNone(parse_retry_after("soon"))
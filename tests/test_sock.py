@@ -0,0 +1,232 @@
+import asyncio
+import json
+import unittest
+from typing import Any, Optional
+from unittest import mock
+
+from src.pyowletapi.decoder import decoder_for
+from src.pyowletapi.sock import PropertiesDict, Sock
+
+from .fake_owlet import VITALS, FakeOwletTestCase
+
+
+class ScriptedSock(Sock):
+    """A v3 sock whose updates return the given properties and changed keys in turn."""
+
+    def __init__(self, updates: list[tuple[dict[str, Any], set[str]]]) -> None:
+        api = mock.Mock()
+        api.device_version.return_value = 3
+        super().__init__(api, {"dsn": "DSN1"})  # type: ignore[typeddict-item]
+        self.updates = updates
+
+    async def update_properties(
+        self, deadline: Optional[float] = None, full: bool = False
+    ) -> PropertiesDict:
+        properties, changed = self.updates.pop(0)
+        return {
+            "raw_properties": {},
+            "properties": properties,  # type: ignore[typeddict-item]
+            "changed": changed,  # type: ignore[typeddict-item]
+        }
+
+
+class StreamTests(unittest.IsolatedAsyncioTestCase):
+    async def intervals(
+        self, updates: list[tuple[dict[str, Any], set[str]]]
+    ) -> list[float]:
+        waits: list[float] = []
+
+        async def sleep(seconds: float) -> None:
+            waits.append(seconds)
+
+        sock = ScriptedSock(updates)
+        count = len(updates)
+        with mock.patch("src.pyowletapi.sock.asyncio.sleep", sleep):
+            async for _ in sock.stream(min_interval=5, max_interval=40):
+                if len(waits) == count - 1:
+                    break
+        return waits
+
+    async def test_backs_off_while_quiet(self) -> None:
+        awake = {"base_station_on": True}
+        waits = await self.intervals([(awake, {"heart_rate"})] + [(awake, set())] * 5)
+        self.assertEqual(waits, [5, 10, 20, 40, 40])
+
+    async def test_vitals_change_and_alerts_reset_interval(self) -> None:
+        awake = {"base_station_on": True}
+        waits = await self.intervals(
+            [
+                (awake, set()),
+                (awake, set()),
+                (awake, {"oxygen_saturation"}),
+                (awake, set()),
+                ({**awake, "low_oxygen_alert": True}, set()),
+                (awake, set()),
+            ]
+        )
+        self.assertEqual(waits, [10, 20, 5, 10, 5])
+
+    async def test_idle_sock_waits_longest(self) -> None:
+        waits = await self.intervals(
+            [
+                ({"base_station_on": True}, {"heart_rate"}),
+                ({"base_station_on": True, "sock_off": True}, {"heart_rate"}),
+                ({"base_station_on": True, "charging": True}, set()),
+                ({"base_station_on": False}, set()),
+                ({"base_station_on": True}, set()),
+            ]
+        )
+        self.assertEqual(waits, [5, 40, 40, 40])
+
+    async def test_cancelling_consumer_leaves_nothing_running(self) -> None:
+        sock = ScriptedSock([({"base_station_on": True}, set())])
+        updates: list[PropertiesDict] = []
+
+        async def consume() -> None:
+            async for response in sock.stream(min_interval=5, max_interval=40):
+                updates.append(response)
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(asyncio.all_tasks(), {asyncio.current_task()})
+
+
+class SockTestCase(FakeOwletTestCase):
+    """self.sock is a v3 sock on the fake server, its version not yet known."""
+
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        await self.api.close()
+        self.api = self.server.api(validate_requests=False)
+        self.sock = Sock(self.api, {"dsn": "DSN1"})  # type: ignore[typeddict-item]
+
+
+class VitalsTests(SockTestCase):
+    def property_requests(self) -> set[str]:
+        """Returns the property reads made, as the path after the dsns segment, leaving out activations."""
+        return {
+            path.split("/dsns/")[1]
+            for path in self.server.calls
+            if "/properties" in path and not path.endswith("/datapoints.json")
+        }
+
+    async def test_v3_fetches_only_real_time_vitals(self) -> None:
+        sock = self.sock
+        await sock.update_properties()
+        self.server.calls.clear()
+        self.server.report("REAL_TIME_VITALS", json.dumps({**VITALS, "hr": 130}))
+        self.server.report("HIGH_OX_ALRT", 1)
+
+        response = await sock.update_vitals()
+
+        self.assertEqual(
+            self.property_requests(),
+            {"DSN1/properties/REAL_TIME_VITALS.json"},
+        )
+        self.assertEqual(response["properties"]["heart_rate"], 130)
+        self.assertFalse(response["properties"]["high_oxygen_alert"])
+        self.assertEqual(response["changed"], {"heart_rate", "last_updated"})
+
+    async def test_v2_fetches_only_vitals_properties(self) -> None:
+        self.server.versions = {"DSN2": 2}
+        sock = Sock(self.api, {"dsn": "DSN2"})  # type: ignore[typeddict-item]
+        await sock.update_properties()
+        self.server.calls.clear()
+        self.server.report("HEART_RATE", 125)
+        self.server.report("HIGH_OX_ALRT", 1)
+
+        response = await sock.update_vitals()
+
+        self.assertEqual(
+            self.property_requests(),
+            {"DSN2/properties.json"},
+        )
+        self.assertEqual(response["changed"], {"heart_rate"})
+        self.assertFalse(response["properties"]["high_oxygen_alert"])
+
+    async def test_unknown_version_updates_every_property(self) -> None:
+        sock = self.sock
+        self.assertIsNone(sock.version)
+
+        response = await sock.update_vitals()
+
+        self.assertEqual(
+            self.property_requests(),
+            {"DSN1/properties.json"},
+        )
+        self.assertEqual(sock.version, 3)
+        self.assertEqual(sock.revision, 5)
+        self.assertIn("high_oxygen_alert", response["properties"])
+
+
+class IncrementalDecodeTests(SockTestCase):
+    async def test_unchanged_properties_not_decoded_again(self) -> None:
+        first = await self.sock.update_properties()
+        self.assertIn("heart_rate", first["changed"])
+
+        with mock.patch("src.pyowletapi.sock.decoder_for") as decoder_for:
+            response = await self.sock.update_properties()
+
+        decoder_for.assert_not_called()
+        self.assertEqual(response["changed"], set())
+        self.assertEqual(response["properties"], first["properties"])
+
+    async def test_only_reported_property_decoded_again(self) -> None:
+        await self.sock.update_properties()
+        self.server.report("HIGH_OX_ALRT", 1)
+
+        decoder = decoder_for(3)
+        with mock.patch.object(
+            decoder, "decode_changed", wraps=decoder.decode_changed
+        ) as decode_changed:
+            response = await self.sock.update_properties()
+
+        self.assertEqual(decode_changed.call_args.args[2], {"HIGH_OX_ALRT"})
+        self.assertEqual(response["changed"], {"high_oxygen_alert"})
+
+
+class SockSubscriptionTests(SockTestCase):
+    async def test_publishes_changed_keys(self) -> None:
+        await self.sock.update_properties()
+        subscription = self.sock.subscribe()
+        self.server.report("HIGH_OX_ALRT", 1)
+
+        await self.sock.update_properties()
+
+        self.assertEqual(
+            subscription.get_nowait(),
+            {
+                "serial": "DSN1",
+                "changes": {"high_oxygen_alert": {"old": False, "new": True}},
+            },
+        )
+        await self.sock.update_properties()
+        self.assertEqual(subscription.qsize(), 0)
+
+    async def test_keys_filter(self) -> None:
+        await self.sock.update_properties()
+        subscription = self.sock.subscribe(keys=["heart_rate"])
+        self.server.report("HIGH_OX_ALRT", 1)
+        await self.sock.update_properties()
+        self.assertEqual(subscription.qsize(), 0)
+
+        self.server.report("REAL_TIME_VITALS", json.dumps({**VITALS, "hr": 130}))
+        self.server.report("HIGH_OX_ALRT", 0)
+        await self.sock.update_properties()
+
+        self.assertEqual(
+            subscription.get_nowait(),
+            {"serial": "DSN1", "changes": {"heart_rate": {"old": 120, "new": 130}}},
+        )
+
+    async def test_close_unsubscribes(self) -> None:
+        subscription = self.sock.subscribe()
+        subscription.close()
+        self.assertEqual(self.sock._subscriptions, [])
+
+        await self.sock.update_properties()
+        self.assertEqual(subscription.qsize(), 0)
@@ -0,0 +1,51 @@
+import asyncio
+import unittest
+
+from src.pyowletapi.subscription import ChangeEvent, Subscription
+
+
+def change(old: float, new: float) -> dict[str, float]:
+    return {"old": old, "new": new}
+
+
+class SubscriptionTests(unittest.IsolatedAsyncioTestCase):
+    async def test_callback_filtered_by_keys(self) -> None:
+        events: list[ChangeEvent] = []
+        subscription = Subscription("DSN", events.append, keys=["heart_rate"])
+        await subscription.publish({"heart_rate": change(120, 130), "movement": change(1, 2)})  # type: ignore[dict-item]
+        await subscription.publish({"movement": change(2, 3)})  # type: ignore[dict-item]
+        self.assertEqual(
+            events, [{"serial": "DSN", "changes": {"heart_rate": change(120, 130)}}]
+        )
+
+    async def test_drop_oldest(self) -> None:
+        subscription = Subscription("DSN", maxsize=2)
+        for hr in (130, 140, 150):
+            await subscription.publish({"heart_rate": change(hr - 10, hr)})  # type: ignore[dict-item]
+        self.assertEqual(subscription.dropped, 1)
+        event = await subscription.get()
+        assert event is not None
+        self.assertEqual(event["changes"]["heart_rate"], change(130, 140))
+
+    async def test_coalesce(self) -> None:
+        subscription = Subscription("DSN", maxsize=1, overflow="coalesce")
+        await subscription.publish({"heart_rate": change(120, 130), "movement": change(1, 2)})  # type: ignore[dict-item]
+        await subscription.publish({"heart_rate": change(130, 140), "movement": change(2, 1)})  # type: ignore[dict-item]
+        self.assertEqual(
+            subscription.get_nowait(),
+            {"serial": "DSN", "changes": {"heart_rate": change(120, 140)}},
+        )
+
+    async def test_close_ends_iteration(self) -> None:
+        closed: list[Subscription] = []
+        subscription = Subscription("DSN", on_close=closed.append)
+        await subscription.publish({"heart_rate": change(120, 130)})  # type: ignore[dict-item]
+
+        async def read() -> list[object]:
+            return [event async for event in subscription]
+
+        reader = asyncio.create_task(read())
+        await asyncio.sleep(0)
+        subscription.close()
+        self.assertEqual(len(await reader), 1)
+        self.assertEqual(closed, [subscription])
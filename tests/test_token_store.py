@@ -0,0 +1,95 @@
+import unittest
+import os
+import tempfile
+
+from src.pyowletapi.api import OwletAPI, TokenDict
+from src.pyowletapi.token_store import FileTokenStore, MemoryTokenStore, TokenStore
+
+from .fake_owlet import FakeOwlet
+
+
+TOKENS: TokenDict = {
+    "api_token": "token",
+    "expiry": 4102444800.0,
+    "refresh": "refresh",
+    "ayla_refresh": "ayla_refresh",
+}
+
+
+class FileTokenStoreTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "tokens.json")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    async def test_load_missing_file(self) -> None:
+        self.assertIsNone(await FileTokenStore(self.path).load())
+
+    async def test_save_and_load(self) -> None:
+        await FileTokenStore(self.path).save(TOKENS)
+        self.assertEqual(await FileTokenStore(self.path).load(), TOKENS)
+
+    async def test_load_corrupt_file(self) -> None:
+        with open(self.path, "w") as file:
+            file.write("{")
+        self.assertIsNone(await FileTokenStore(self.path).load())
+
+
+class TokenStoreTests(unittest.TestCase):
+    def test_load_and_save_are_abstract(self) -> None:
+        class LoadOnly(TokenStore):
+            async def load(self) -> None:
+                return None
+
+        with self.assertRaises(TypeError):
+            TokenStore()  # type: ignore[abstract]
+        with self.assertRaises(TypeError):
+            LoadOnly()  # type: ignore[abstract]
+
+
+class OwletTokenStoreTests(unittest.IsolatedAsyncioTestCase):
+    async def test_authenticate_from_store(self) -> None:
+        owlet = OwletAPI("europe", token_store=MemoryTokenStore(TOKENS))
+        self.assertIsNone(await owlet.authenticate())
+        self.assertEqual(owlet.tokens, TOKENS)
+        await owlet.close()
+
+    async def test_changed_tokens_saved(self) -> None:
+        store = MemoryTokenStore()
+        owlet = OwletAPI("europe", token_store=store)
+        owlet._update_tokens("new", 4102444800.0, "refresh", None)
+        await owlet._save_tokens()
+        stored = await store.load()
+        assert stored is not None
+        self.assertEqual(stored["api_token"], "new")
+        await owlet.close()
+
+    async def test_public_sign_in_saves_tokens(self) -> None:
+        server = FakeOwlet()
+        await server.start()
+        self.addAsyncCleanup(server.close)
+        store = MemoryTokenStore()
+        owlet = server.api(token_store=store, ayla_refresh="arefresh")
+        self.addAsyncCleanup(owlet.close)
+
+        await owlet.token_sign_in("mini")
+        self.assertEqual(await store.load(), owlet.tokens)
+
+        await owlet.ayla_token_refresh()
+        self.assertEqual(await store.load(), owlet.tokens)
+
+    async def test_refresh_adopts_shared_tokens(self) -> None:
+        store = MemoryTokenStore(TOKENS)
+        owlet = OwletAPI(
+            "europe",
+            token="old",
+            expiry=0,
+            refresh="refresh",
+            token_store=store,
+        )
+        await owlet.refresh_authentication()
+        self.assertEqual(owlet.tokens["api_token"], "token")
+        self.assertEqual(owlet.metrics["tokens_adopted"], 1)
+        await owlet.close()